@@ -0,0 +1,147 @@
+"""
+Backend simbólico para las operaciones calientes de la búsqueda de factores.
+
+Productos, derivadas, expansión y evaluación en puntos numéricos se hacen con
+symengine (implementado en C++) cuando está instalado, y con sympy en caso
+contrario. Las expresiones de symengine se convierten a sympy solo cuando hace
+falta: pruebas de cero simbólicas, operaciones que symengine no tiene y el
+resultado final.
+"""
+
+import contextlib
+
+import sympy as sp
+
+try:
+    import symengine as se
+except ImportError:  # symengine es opcional
+    se = None
+
+BACKENDS = ('sympy', 'symengine')
+
+# Con symengine se evalúa en doble precisión: un valor solo cuenta como distinto de cero
+# si supera este múltiplo de la magnitud de los términos que se restan
+TOLERANCIA_RELATIVA_DOBLE = 1e-9
+
+# sympy usa evalf con 30 dígitos
+DIGITOS_SYMPY = 30
+
+_activo = 'symengine' if se is not None else 'sympy'
+
+def symengine_disponible():
+    return se is not None
+
+def backend_activo():
+    return _activo
+
+def usar_backend(nombre):
+    """
+    Selecciona el backend ('sympy' o 'symengine'). Si se pide symengine y no está
+    instalado se usa sympy. Devuelve el backend efectivo.
+    """
+    global _activo
+    if nombre not in BACKENDS:
+        raise ValueError(f"Backend desconocido: {nombre!r} (opciones: {', '.join(BACKENDS)})")
+    _activo = nombre if nombre == 'sympy' or se is not None else 'sympy'
+    return _activo
+
+@contextlib.contextmanager
+def usando_backend(nombre):
+    """
+    Usa el backend `nombre` dentro del bloque y restaura el anterior. nombre=None no cambia nada.
+    """
+    previo = _activo
+    if nombre is not None:
+        usar_backend(nombre)
+    try:
+        yield _activo
+    finally:
+        usar_backend(previo)
+
+def es_nativa(expr):
+    """
+    True si expr es una expresión de symengine (y no de sympy)
+    """
+    return se is not None and isinstance(expr, se.Basic) and not isinstance(expr, sp.Basic)
+
+def a_sympy(expr):
+    return sp.sympify(expr) if es_nativa(expr) else expr
+
+def _a_symengine(*exprs):
+    # None si alguna expresión usa algo que symengine no representa (Integral, Piecewise, ...)
+    try:
+        return [se.sympify(e) for e in exprs]
+    except (TypeError, ValueError, RuntimeError, NotImplementedError, AttributeError):
+        return None
+
+def condicion_exactitud(M, N, mu, x, y):
+    """
+    ∂(μM)/∂y - ∂(μN)/∂x con el backend activo. Con symengine el resultado es una
+    expresión de symengine; usar a_sympy para seguir trabajando con sympy.
+    """
+    if _activo == 'symengine':
+        convertidas = _a_symengine(M, N, mu, x, y)
+        if convertidas is not None:
+            M_, N_, mu_, x_, y_ = convertidas
+            return se.diff(M_ * mu_, y_) - se.diff(N_ * mu_, x_)
+    return sp.diff(M * mu, y) - sp.diff(N * mu, x)
+
+def es_polinomio_nulo(expr):
+    """
+    True si la expansión de expr (un polinomio) es cero
+    """
+    if _activo == 'symengine' or es_nativa(expr):
+        convertidas = _a_symengine(expr)
+        if convertidas is not None:
+            return se.expand(convertidas[0]) == 0
+    return sp.expand(expr) == 0
+
+def evaluar(expr, valores, tolerancia=1e-15):
+    """
+    Evalúa expr en el punto `valores` ({símbolo: racional}).
+    Devuelve (valor complejo, tolerancia) o None si no se puede evaluar: un valor cuyo
+    módulo no supera la tolerancia no distingue la expresión de cero. `tolerancia` es la
+    de la evaluación de sympy; la de symengine depende de la magnitud de los términos.
+    """
+    if _activo == 'symengine' or es_nativa(expr):
+        convertidas = _a_symengine(expr)
+        if convertidas is not None:
+            evaluado = _evaluar_symengine(convertidas[0], valores)
+            if evaluado is not None:
+                return evaluado
+    try:
+        valor = a_sympy(expr).evalf(DIGITOS_SYMPY, subs={sp.sympify(s): v for s, v in valores.items()})
+        if not (valor.is_number and valor.is_finite):
+            return None
+        return complex(valor), tolerancia
+    except Exception:
+        return None
+
+def _evaluar_symengine(expr, valores):
+    sustitucion = {se.sympify(s): float(v) for s, v in valores.items()}
+    try:
+        valor = complex(expr.subs(sustitucion).n())
+        escala = _escala_redondeo(expr, sustitucion)
+    except (TypeError, ValueError, RuntimeError, OverflowError):
+        return None
+    if valor != valor or escala != escala or escala == float('inf'):  # NaN o desborde
+        return None
+    return valor, TOLERANCIA_RELATIVA_DOBLE * max(1.0, escala)
+
+def _escala_redondeo(expr, sustitucion):
+    # Magnitud que acota el error de redondeo de expr, incluidas las cancelaciones anidadas:
+    # en exp(10xy)·(sen²y + cos²y - 1) el error del segundo factor se multiplica por el primero
+    if isinstance(expr, se.Add):
+        return sum(_escala_redondeo(t, sustitucion) for t in expr.args)
+    if isinstance(expr, se.Mul):
+        escala = 1.0
+        for factor in expr.args:
+            escala *= _escala_redondeo(factor, sustitucion)
+        return escala
+    if isinstance(expr, se.Pow) and expr.args[1].is_Integer and expr.args[1] > 0:
+        return _escala_redondeo(expr.args[0], sustitucion) ** int(expr.args[1])
+    modulo = abs(complex(expr.subs(sustitucion).n()))
+    if not expr.args:
+        return modulo
+    # f(u): el error relativo de u se amplifica, a lo sumo en el orden de |u| (exp, potencias)
+    return modulo * (1 + sum(_escala_redondeo(u, sustitucion) for u in expr.args))
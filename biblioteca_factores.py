@@ -0,0 +1,261 @@
+"""
+Biblioteca precompilada de factores integrantes candidatos.
+
+Las familias de candidatos que prueba analizar_ecuacion_exacta (racionales,
+especiales, x^m·y^n, combinaciones lineales, trigonométricos, ...) se construyen
+una sola vez junto con sus derivadas logarítmicas μ_x/μ y μ_y/μ y los valores de
+éstas en PUNTOS_CRIBA. Con esos valores, CribaNumerica descarta un candidato
+comprobando numéricamente
+
+    ∂M/∂y - ∂N/∂x = (μ_x/μ)·N - (μ_y/μ)·M
+
+sin multiplicar M y N por μ ni derivar.
+
+La biblioteca se guarda como una instantánea versionada (pickle) que se carga al
+iniciar un proceso; los procesos de un pool la comparten de solo lectura.
+
+Uso:
+    python biblioteca_factores.py --construir     # regenerar la instantánea
+"""
+
+import argparse
+import hashlib
+import math
+import os
+import pickle
+
+import sympy as sp
+from sympy import exp, sin, cos
+
+VERSION_BIBLIOTECA = 1
+
+RUTA_INSTANTANEA = os.environ.get(
+    'BIBLIOTECA_FACTORES', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'biblioteca_factores.pkl'))
+
+# Puntos de la criba numérica (positivos, fuera de las rectas x = y, x = -y, ...)
+PUNTOS_CRIBA = ((0.7, 1.3), (17 / 7, 5 / 3), (11 / 9, 29 / 11))
+TOLERANCIA_CRIBA = 1e-8
+
+_biblioteca = None
+
+class Candidato:
+    """
+    Factor candidato con su nombre, derivadas logarítmicas y valores de éstas en PUNTOS_CRIBA.
+    """
+    __slots__ = ('mu', 'nombre', 'derivada_log_x', 'derivada_log_y', 'valores_criba')
+
+    def __init__(self, mu, nombre, x, y):
+        self.mu = mu
+        self.nombre = nombre
+        self.derivada_log_x = sp.cancel(sp.diff(mu, x) / mu)
+        self.derivada_log_y = sp.cancel(sp.diff(mu, y) / mu)
+        derivadas = sp.lambdify((x, y), (self.derivada_log_x, self.derivada_log_y), 'math')
+        self.valores_criba = tuple(_evaluar(derivadas, punto) for punto in PUNTOS_CRIBA)
+
+    def __getstate__(self):
+        return (self.mu, self.nombre, self.derivada_log_x, self.derivada_log_y, self.valores_criba)
+
+    def __setstate__(self, estado):
+        self.mu, self.nombre, self.derivada_log_x, self.derivada_log_y, self.valores_criba = estado
+
+    def __repr__(self):
+        return f"Candidato({self.nombre!r})"
+
+def _evaluar(funcion, punto):
+    # None si la función no está definida (o no es real) en el punto
+    try:
+        valores = funcion(*punto)
+    except (ValueError, ZeroDivisionError, OverflowError, TypeError, NameError):
+        return None
+    if not all(isinstance(v, (int, float)) and math.isfinite(v) for v in valores):
+        return None
+    return tuple(float(v) for v in valores)
+
+class CribaNumerica:
+    """
+    Valores de M, N y ∂M/∂y - ∂N/∂x de una ecuación en PUNTOS_CRIBA.
+    descarta(candidato) es True solo si algún punto prueba que el candidato no es factor.
+    """
+    __slots__ = ('valores',)
+
+    def __init__(self, M, N, dM_dy, dN_dx, x, y):
+        try:
+            funcion = sp.lambdify((x, y), (M, N, dM_dy - dN_dx), 'math')
+        except Exception:
+            self.valores = ()
+            return
+        self.valores = tuple(_evaluar(funcion, punto) for punto in PUNTOS_CRIBA)
+
+    def descarta(self, candidato):
+        for derivadas, valores in zip(candidato.valores_criba, self.valores):
+            if derivadas is None or valores is None:
+                continue
+            p, q = derivadas
+            M, N, D = valores
+            residuo = D - p*N + q*M
+            escala = abs(D) + abs(p*N) + abs(q*M)
+            if abs(residuo) > TOLERANCIA_CRIBA * max(1.0, escala):
+                return True
+        return False
+
+def definiciones_candidatos(x, y):
+    """
+    Definiciones de las familias de candidatos: {familia: [(mu, nombre), ...]} en el orden de prueba
+    """
+    return {
+        # Para ecuaciones racionales como (1/x)dx - (1+xy²)dy = 0
+        'racionales': [
+            (x, 'μ = x'),
+            (x**2, 'μ = x²'),
+            (1/(1 + x*y**2), 'μ = 1/(1+xy²)'),
+            (x/(1 + x*y**2), 'μ = x/(1+xy²)'),
+            ((1 + x*y**2)/x, 'μ = (1+xy²)/x'),
+        ],
+        'especiales': [
+            (x, 'μ = x'),
+            (y, 'μ = y'),
+            (x*y, 'μ = xy'),
+            (x**2, 'μ = x²'),
+            (y**2, 'μ = y²'),
+            (x**2 * y, 'μ = x²y'),
+            (x * y**2, 'μ = xy²'),
+            (x**2 * y**2, 'μ = x²y²'),
+            (1/x, 'μ = 1/x'),
+            (1/y, 'μ = 1/y'),
+            (1/(x*y), 'μ = 1/(xy)'),
+            (1/(x**2), 'μ = 1/x²'),
+            (1/(y**2), 'μ = 1/y²'),
+            (1/(x**2 * y), 'μ = 1/(x²y)'),
+            (1/(x * y**2), 'μ = 1/(xy²)'),
+            ((x + y), 'μ = x + y'),
+            ((x - y), 'μ = x - y'),
+            (1/(x + y), 'μ = 1/(x + y)'),
+            (1/(x - y), 'μ = 1/(x - y)'),
+            (exp(x), 'μ = eˣ'),
+            (exp(y), 'μ = eʸ'),
+            (exp(x + y), 'μ = e^(x+y)'),
+            (exp(x - y), 'μ = e^(x-y)'),
+        ],
+        # μ = x^m * y^n con m, n de -3 a 3
+        'monomios': [(x**m * y**n, f'μ = {x**m * y**n}')
+                     for m in range(-3, 4) for n in range(-3, 4) if (m, n) != (0, 0)],
+        'combinaciones': [
+            (x + y, 'μ = (x + y)'),
+            (x - y, 'μ = (x - y)'),
+            (x + 2*y, 'μ = (x + 2y)'),
+            (2*x + y, 'μ = (2x + y)'),
+            (x**2 + y**2, 'μ = (x² + y²)'),
+            (x**2 - y**2, 'μ = (x² - y²)'),
+        ],
+        'trig_avanzado': [
+            (exp(sin(x)), 'μ = e^(sin(x))'),
+            (exp(cos(x)), 'μ = e^(cos(x))'),
+            (exp(sin(y)), 'μ = e^(sin(y))'),
+            (exp(cos(y)), 'μ = e^(cos(y))'),
+            (exp(sin(x) + cos(y)), 'μ = e^(sin(x) + cos(y))'),
+            (exp(cos(x) + sin(y)), 'μ = e^(cos(x) + sin(y))'),
+            (exp(sin(x) + sin(y)), 'μ = e^(sin(x) + sin(y))'),
+            (exp(cos(x) + cos(y)), 'μ = e^(cos(x) + cos(y))'),
+            (exp(sin(x) - cos(x)), 'μ = e^(sin(x) - cos(x))'),
+            (exp(cos(x) - sin(x)), 'μ = e^(cos(x) - sin(x))'),
+        ],
+        'trigonometricos': [(mu, f'μ = {mu}') for mu in (
+            exp(sin(x)), exp(cos(x)), exp(sin(y)), exp(cos(y)),
+            exp(sin(x) + sin(y)), exp(cos(x) + cos(y)),
+            exp(sin(x) + cos(y)), exp(cos(x) + sin(y)),
+            exp(sin(x) - cos(x)), exp(cos(x) - sin(x)),
+            exp(sin(y) - cos(y)), exp(cos(y) - sin(y)),
+            1/(cos(x)), 1/(sin(x)), 1/(cos(y)), 1/(sin(y)),
+        )],
+        # Para ecuaciones de la forma ax^m*y^n + bx^p*y^q + c
+        'polinomiales': [
+            (1/y, 'μ = 1/y'),
+            (1/(y**2), 'μ = 1/y²'),
+            (1/(y**3), 'μ = 1/y³'),
+            (1/x, 'μ = 1/x'),
+            (1/(x**2), 'μ = 1/x²'),
+            (1/(x*y), 'μ = 1/(xy)'),
+            (1/(x*y**2), 'μ = 1/(xy²)'),
+            (1/(x**2*y), 'μ = 1/(x²y)'),
+            (x/y, 'μ = x/y'),
+            (y/x, 'μ = y/x'),
+            (x/(y**2), 'μ = x/y²'),
+            (y/(x**2), 'μ = y/x²'),
+        ],
+    }
+
+def construir_biblioteca():
+    """
+    Construye todas las familias de candidatos: {familia: tuple(Candidato)} en el orden de prueba
+    """
+    x, y = sp.symbols('x y')
+    return {familia: tuple(Candidato(mu, nombre, x, y) for mu, nombre in candidatos)
+            for familia, candidatos in definiciones_candidatos(x, y).items()}
+
+def _huella_definiciones():
+    # Resumen de las definiciones: editar un candidato invalida la instantánea aunque no se
+    # haya cambiado VERSION_BIBLIOTECA
+    x, y = sp.symbols('x y')
+    resumen = hashlib.sha256()
+    for familia, candidatos in definiciones_candidatos(x, y).items():
+        resumen.update(familia.encode('utf-8') + b'\0')
+        for mu, nombre in candidatos:
+            resumen.update(f"{nombre}\0{mu}\0".encode('utf-8'))
+    return resumen.hexdigest()
+
+def _firma():
+    # La instantánea solo sirve con la misma versión de la biblioteca, de sympy, de los puntos
+    # y de las definiciones de los candidatos
+    return {'version': VERSION_BIBLIOTECA, 'sympy': sp.__version__, 'puntos': PUNTOS_CRIBA,
+            'definiciones': _huella_definiciones()}
+
+def guardar_biblioteca(biblioteca, ruta=RUTA_INSTANTANEA):
+    temporal = ruta + '.tmp'
+    with open(temporal, 'wb') as f:
+        pickle.dump({'firma': _firma(), 'familias': biblioteca}, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temporal, ruta)
+
+def cargar_biblioteca(ruta=RUTA_INSTANTANEA):
+    """
+    Carga la instantánea; None si no existe, está dañada o es de otra versión
+    """
+    try:
+        with open(ruta, 'rb') as f:
+            datos = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        return None
+    if not isinstance(datos, dict) or datos.get('firma') != _firma():
+        return None
+    return datos['familias']
+
+def obtener_biblioteca():
+    """
+    Biblioteca del proceso: se carga de la instantánea o, si no sirve, se construye y se
+    intenta guardar. Llamarla antes de crear un pool la comparte con los procesos hijos.
+    """
+    global _biblioteca
+    if _biblioteca is None:
+        biblioteca = cargar_biblioteca()
+        if biblioteca is None:
+            biblioteca = construir_biblioteca()
+            try:
+                guardar_biblioteca(biblioteca)
+            except OSError:
+                pass  # directorio de solo lectura: se usa la biblioteca en memoria
+        _biblioteca = biblioteca
+    return _biblioteca
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Biblioteca precompilada de factores integrantes candidatos")
+    parser.add_argument('--construir', action='store_true', help="reconstruir y guardar la instantánea")
+    parser.add_argument('--ruta', default=RUTA_INSTANTANEA)
+    args = parser.parse_args(argv)
+    if args.construir or cargar_biblioteca(args.ruta) is None:
+        guardar_biblioteca(construir_biblioteca(), args.ruta)
+        print(f"Instantánea guardada en {args.ruta}")
+    biblioteca = cargar_biblioteca(args.ruta)
+    for familia, candidatos in biblioteca.items():
+        print(f"{familia}: {len(candidatos)} candidatos")
+
+if __name__ == "__main__":
+    main()
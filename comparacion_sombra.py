@@ -0,0 +1,263 @@
+"""
+Comparación en sombra: configuración de referencia frente a una configuración rápida.
+
+Analiza el mismo corpus (ecuaciones fijas más ecuaciones aleatorias con factor
+integrante conocido) con las dos configuraciones de analizar_ecuacion_exacta y:
+
+- verifica de forma independiente (simplify y evaluación numérica, sin el motor
+  es_cero) que cada factor reportado hace exacta la ecuación,
+- marca las ecuaciones donde la configuración rápida pierde un factor que la
+  referencia sí encuentra, o reporta un factor que no es válido,
+- informa la aceleración por ecuación y por clase.
+
+Uso:
+    python comparacion_sombra.py --aleatorias 20 --semilla 1
+    python comparacion_sombra.py --rapida rapida --referencia referencia --json informe.json
+    python comparacion_sombra.py --referencia sympy --rapida symengine    # comparar backends
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import random
+import sys
+import time
+
+import sympy as sp
+from sympy.core.cache import clear_cache
+
+from backend_simbolico import symengine_disponible
+from ecuacion_exacta import analizar_ecuacion_exacta, parsear_ecuacion, clasificar_ecuacion
+
+# Opciones de analizar_ecuacion_exacta para cada configuración con nombre.
+# La referencia es la búsqueda exhaustiva con sympy, sin clasificación previa, poda de familias,
+# criba numérica, límites de tamaño ni plazo para decidir la exactitud.
+# 'sympy' y 'symengine' comparan los backends con el resto de las opciones por defecto.
+SIN_LIMITES_TAMANO = {'candidato': float('inf'), 'simplify': float('inf')}
+
+CONFIGURACIONES = {
+    'referencia': {'clasificar': False, 'podar_candidatos': False, 'cribar': False,
+                   'limites_tamano': SIN_LIMITES_TAMANO, 'plazo_exactitud': None, 'backend': 'sympy'},
+    'rapida': {},
+    'sympy': {'backend': 'sympy'},
+    'symengine': {'backend': 'symengine'},
+}
+
+ECUACIONES_FIJAS = [
+    "(x-y+1)*dx-dy=0",
+    "2*x*y*dx + x**2*dy = 0",
+    "y*dx-x*dy=0",
+    "(x**2+y)*dx + x*dy = 0",
+    "(1/x)*dx-(1+x*y**2)*dy=0",
+    "(4*x*y**2 + 3*y)*dx + (3*x**2*y + 2*x)*dy = 0",
+    "(x*y**3+1)*dx+x**2*y**2*dy=0",
+    "-y*dx+(x+y**2-1)*dy=0",
+    "y*dx+(x-x**2*y)*dy=0",
+    "x**2*y**2*dx+(x**3*y+y+3)*dy=0",
+    "x**2*dx-(x**3*y**2+3*y**2)*dy=0",
+    "(x**2+2*x+y)*dx+(1-x**2-y)*dy=0",
+    "(cos(x)-sen(x)+sen(y))*dx+(cos(x)+sen(y)+cos(y))*dy=0",
+    "(y**2+1)/(2*x+y)**3*dx + 2*x*y/(2*x+y)**3*dy = 0",
+    "(1+x*y**2)*dx+(1+x*y**2)*dy=0",
+    "(1+x*y**2)*sin(x)*dx+(1+x*y**2)*dy=0",
+    "(1+x*y**2)*exp(x)*dx+(1+x*y**2)*dy=0",
+]
+
+# Familias de factores para generar ecuaciones aleatorias: M = F_x/μ, N = F_y/μ.
+# 'racional_trascendente' usa un μ racional con un potencial que tiene sen/cos/exp,
+# así que M y N no son racionales
+FAMILIAS_ALEATORIAS = ('monomio', 'exponencial', 'sustitucion', 'funcion_de_x', 'racional',
+                       'racional_trascendente')
+
+TOLERANCIA_VERIFICACION = 1e-8
+
+def generar_ecuaciones(cantidad, semilla=0):
+    """
+    Genera `cantidad` ecuaciones no exactas con factor integrante conocido.
+    Devuelve una lista de (ecuacion, familia, mu).
+    """
+    x, y = sp.symbols('x y')
+    rng = random.Random(semilla)
+    ecuaciones = []
+    intentos = 0
+    while len(ecuaciones) < cantidad and intentos < 20 * cantidad:
+        intentos += 1
+        familia = rng.choice(FAMILIAS_ALEATORIAS)
+        mu = _factor_aleatorio(familia, rng, x, y)
+        F = _potencial_aleatorio(rng, x, y)
+        if familia == 'racional_trascendente':
+            F += rng.choice([sp.sin(x), sp.cos(y), sp.exp(x), sp.exp(y)])
+        M = sp.cancel(sp.diff(F, x) / mu)
+        N = sp.cancel(sp.diff(F, y) / mu)
+        if M == 0 or N == 0 or sp.cancel(sp.diff(M, y) - sp.diff(N, x)) == 0:
+            continue
+        ecuacion = f"({sp.sstr(M)})*dx + ({sp.sstr(N)})*dy = 0"
+        try:
+            M_leido, N_leido = parsear_ecuacion(ecuacion)
+        except ValueError:
+            continue
+        if sp.cancel(M_leido - M) != 0 or sp.cancel(N_leido - N) != 0:
+            continue
+        ecuaciones.append((ecuacion, familia, mu))
+    return ecuaciones
+
+def _potencial_aleatorio(rng, x, y):
+    # Polinomio de grado <= 3 que depende de ambas variables
+    while True:
+        F = sum(rng.randint(-3, 3) * x**i * y**j
+                for i in range(4) for j in range(4) if 0 < i + j <= 3 and rng.random() < 0.4)
+        if F != 0 and F.has(x) and F.has(y):
+            return F
+
+def _factor_aleatorio(familia, rng, x, y):
+    if familia == 'monomio':
+        a, b = rng.randint(-2, 2), rng.randint(-2, 2)
+        return x**a * y**b if (a, b) != (0, 0) else x
+    if familia == 'exponencial':
+        return sp.exp(rng.choice([-2, -1, 1, 2]) * rng.choice([x, y]))
+    if familia == 'sustitucion':
+        g = rng.choice([x*y, x + y, x**2 + y**2])
+        return g**rng.choice([-2, -1, 1, 2])
+    if familia in ('racional', 'racional_trascendente'):
+        # μ racional: ni la falta de denominadores ni las funciones de M y N pueden descartarla
+        return rng.choice([1/(1 + x*y**2), x/(1 + x*y**2), (1 + x*y**2)/x])
+    return (x**2 + rng.randint(1, 3))**rng.choice([-1, 1])
+
+def verificar_factor(M, N, mu, x, y, rng=None):
+    """
+    Verificación independiente del motor es_cero: simplify y, si no concluye,
+    evaluación numérica en puntos al azar.
+    Devuelve 'simbolica', 'numerica' o None si mu no hace exacta la ecuación.
+    """
+    expr = sp.diff(M * mu, y) - sp.diff(N * mu, x)
+    if sp.simplify(expr) == 0:
+        return 'simbolica'
+    rng = rng or random.Random(0)
+    evaluados = 0
+    for _ in range(8):
+        punto = {x: sp.Float(rng.uniform(0.3, 2.5)), y: sp.Float(rng.uniform(0.3, 2.5))}
+        try:
+            valor = complex(expr.evalf(30, subs=punto))
+        except (TypeError, ValueError):
+            continue
+        if abs(valor) > TOLERANCIA_VERIFICACION:
+            return None
+        evaluados += 1
+    return 'numerica' if evaluados else None
+
+def _analizar_silencioso(ecuacion, opciones, limpiar_cache):
+    if limpiar_cache:
+        clear_cache()
+    inicio = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            resultado = analizar_ecuacion_exacta(ecuacion, **opciones)
+    except Exception as e:
+        return None, time.perf_counter() - inicio, str(e)
+    return resultado, time.perf_counter() - inicio, None
+
+def _clase_ecuacion(M, N, x, y):
+    with contextlib.redirect_stdout(io.StringIO()):
+        if sp.cancel(sp.diff(M, y) - sp.diff(N, x)) == 0:
+            return 'exacta'
+        clase, _ = clasificar_ecuacion(M, N, x, y)
+    return clase or 'sin clase'
+
+def comparar(ecuaciones, referencia=CONFIGURACIONES['referencia'], rapida=CONFIGURACIONES['rapida'],
+             limpiar_cache=True):
+    """
+    Compara las dos configuraciones sobre `ecuaciones` (lista de (ecuacion, clase) o
+    de textos; clase=None la determina clasificar_ecuacion).
+    Devuelve (filas, resumen_por_clase).
+    """
+    x, y = sp.symbols('x y')
+    filas = []
+    for elemento in ecuaciones:
+        ecuacion, clase = (elemento, None) if isinstance(elemento, str) else elemento[:2]
+        fila = {'ecuacion': ecuacion, 'clase': clase}
+        try:
+            M, N = parsear_ecuacion(ecuacion)
+        except ValueError as e:
+            fila['error'] = str(e)
+            filas.append(fila)
+            continue
+        if fila['clase'] is None:
+            fila['clase'] = _clase_ecuacion(M, N, x, y)
+
+        for nombre, opciones in (('referencia', referencia), ('rapida', rapida)):
+            resultado, segundos, error = _analizar_silencioso(ecuacion, opciones, limpiar_cache)
+            fila[f'segundos_{nombre}'] = segundos
+            mu = resultado.factor_integrante if resultado is not None else None
+            fila[f'factor_{nombre}'] = mu
+            fila[f'error_{nombre}'] = error
+            fila[f'verificacion_{nombre}'] = verificar_factor(M, N, mu, x, y) if mu is not None else None
+
+        ref_valido = fila['verificacion_referencia'] is not None
+        fila['invalido'] = fila['factor_rapida'] is not None and fila['verificacion_rapida'] is None
+        fila['perdido'] = ref_valido and fila['verificacion_rapida'] is None
+        fila['aceleracion'] = fila['segundos_referencia'] / max(fila['segundos_rapida'], 1e-9)
+        filas.append(fila)
+    return filas, resumen_por_clase(filas)
+
+def resumen_por_clase(filas):
+    resumen = {}
+    for fila in filas:
+        if 'error' in fila:
+            continue
+        datos = resumen.setdefault(fila['clase'], {'ecuaciones': 0, 'segundos_referencia': 0.0,
+                                                   'segundos_rapida': 0.0, 'perdidos': 0, 'invalidos': 0})
+        datos['ecuaciones'] += 1
+        datos['segundos_referencia'] += fila['segundos_referencia']
+        datos['segundos_rapida'] += fila['segundos_rapida']
+        datos['perdidos'] += fila['perdido']
+        datos['invalidos'] += fila['invalido']
+    for datos in resumen.values():
+        datos['aceleracion'] = datos['segundos_referencia'] / max(datos['segundos_rapida'], 1e-9)
+    return resumen
+
+def imprimir_informe(filas, resumen, salida=sys.stdout):
+    for fila in filas:
+        if 'error' in fila:
+            print(f"ERROR  {fila['ecuacion']}: {fila['error']}", file=salida)
+            continue
+        marca = 'PERDIDO' if fila['perdido'] else 'INVALIDO' if fila['invalido'] else 'ok'
+        print(f"{marca:8s} x{fila['aceleracion']:6.1f}  {fila['segundos_referencia']:7.2f}s -> "
+              f"{fila['segundos_rapida']:6.2f}s  [{fila['clase']}] {fila['ecuacion']}", file=salida)
+        if marca != 'ok':
+            print(f"         referencia: {fila['factor_referencia']}  rápida: {fila['factor_rapida']}", file=salida)
+    print("\nPor clase:", file=salida)
+    for clase, datos in sorted(resumen.items()):
+        print(f"  {clase:20s} {datos['ecuaciones']:3d} ecuaciones  x{datos['aceleracion']:6.1f}  "
+              f"perdidos={datos['perdidos']} inválidos={datos['invalidos']}", file=salida)
+
+def _fila_a_json(fila):
+    return {k: (str(v) if isinstance(v, sp.Basic) else v) for k, v in fila.items()}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Comparación en sombra de configuraciones del analizador")
+    parser.add_argument('--aleatorias', type=int, default=10, help="cantidad de ecuaciones aleatorias")
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--sin-fijas', action='store_true', help="no incluir el corpus fijo")
+    parser.add_argument('--referencia', default='referencia', choices=sorted(CONFIGURACIONES))
+    parser.add_argument('--rapida', default='rapida', choices=sorted(CONFIGURACIONES))
+    parser.add_argument('--json', help="escribir el informe completo en este archivo")
+    args = parser.parse_args(argv)
+
+    if 'symengine' in (args.referencia, args.rapida) and not symengine_disponible():
+        print("Aviso: symengine no está instalado; la configuración 'symengine' usa sympy.", file=sys.stderr)
+
+    corpus = [] if args.sin_fijas else list(ECUACIONES_FIJAS)
+    corpus += [(ecuacion, f'aleatoria: {familia}') for ecuacion, familia, _ in
+               generar_ecuaciones(args.aleatorias, args.semilla)]
+    filas, resumen = comparar(corpus, CONFIGURACIONES[args.referencia], CONFIGURACIONES[args.rapida])
+    imprimir_informe(filas, resumen)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'ecuaciones': [_fila_a_json(f) for f in filas], 'por_clase': resumen},
+                      f, ensure_ascii=False, indent=2)
+    # Código de salida distinto de cero si hay discrepancias, para usarlo en integración continua
+    return 1 if any(f.get('perdido') or f.get('invalido') for f in filas) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
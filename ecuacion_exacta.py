@@ -1,17 +1,393 @@
 import sympy as sp
-from sympy import symbols, diff, Eq, solve, simplify, exp, integrate, log, cos, sin
+from sympy import symbols, diff, Eq, solve, simplify
+from sympy.polys.matrices import DomainMatrix
+from collections import Counter
+from collections.abc import Mapping
+import contextlib
 import re
 
-def analizar_ecuacion_exacta(ecuacion_str):
+from backend_simbolico import (usando_backend, condicion_exactitud, es_nativa, a_sympy,
+                               es_polinomio_nulo, evaluar)
+from integracion import exp_de_integral, integrar, limite_de_tiempo, TiempoAgotado
+from biblioteca_factores import obtener_biblioteca, CribaNumerica
+
+# Niveles del motor de prueba de cero, del más barato al más costoso
+NIVELES_CERO = ('trivial', 'racional', 'numerico', 'trig_exp', 'simplify')
+
+# Puntos (positivos, racionales) donde se busca un testigo numérico de que la expresión no es cero
+PUNTOS_PRUEBA = [
+    (sp.Rational(7, 10), sp.Rational(13, 10)),
+    (sp.Rational(17, 7), sp.Rational(5, 3)),
+    (sp.Rational(11, 9), sp.Rational(29, 11)),
+]
+TOLERANCIA_NUMERICA = 1e-15
+
+# Grados del ansatz μ = Σ c_ij x^i y^j (los exponentes negativos permiten denominadores monomiales)
+GRADO_ANSATZ_MAX = 3
+GRADO_ANSATZ_MIN = -2
+
+# Límites de tamaño (operaciones según count_ops) que acotan el costo de la búsqueda:
+# 'candidato': si ∂(μM)/∂y - ∂(μN)/∂x los supera, el candidato se descarta sin probarlo
+# 'simplify': costo estimado (operaciones × (1 + funciones trascendentes)) por encima del cual
+#             se usa una normalización más barata (cancel) en lugar de simplify y, al probar
+#             candidatos, la prueba de cero queda sin decidir (nivel 'tamano': no es factor)
+LIMITES_TAMANO = {'candidato': 1500, 'simplify': 250}
+
+# Tope de evaluaciones de dy/dx por tramo en SesionAnalisis.curva_por_punto: una curva
+# que se acerca a una singularidad no deja ocupado un hilo del explorador indefinidamente
+MAX_EVALUACIONES_CURVA = 100000
+
+# Plazo (segundos) del simplify de la prueba de exactitud, que no tiene límite de tamaño;
+# si se vence, la exactitud queda sin decidir (es_exacta = None, nivel 'plazo')
+PLAZO_EXACTITUD = 10.0
+
+# Conteo de qué nivel decidió cada prueba de cero durante el análisis en curso
+_registro_niveles = Counter()
+# Límites vigentes y candidatos descartados por tamaño durante el análisis en curso
+_limites_tamano = dict(LIMITES_TAMANO)
+_candidatos_omitidos = []
+
+def es_cero(expr, limitar_tamano=False, plazo=None):
     """
-    Analiza si una ecuación diferencial es exacta y encuentra factor integrante si no lo es.
-    Formato esperado: M(x,y)*dx + N(x,y)*dy = 0
+    Decide si una expresión es idénticamente cero usando niveles de costo creciente.
+    Devuelve (es_cero, nivel), donde nivel indica la etapa que tomó la decisión.
+    es_cero es None si no se pudo decidir: con limitar_tamano, simplify se omite para
+    expresiones que superan el límite (nivel 'tamano'); con un plazo, simplify se
+    interrumpe al vencerse (nivel 'plazo').
     """
-    x, y = symbols('x y')
+    es_nula, nivel = _es_cero_por_niveles(sp.sympify(expr), limitar_tamano, plazo)
+    _registro_niveles[nivel] += 1
+    return es_nula, nivel
+
+def _es_cero_por_niveles(expr, limitar_tamano=False, plazo=None):
+    # Nivel trivial: la expresión ya está en forma canónica
+    if expr == 0 or expr.is_zero:
+        return True, 'trivial'
+    if expr.is_number and expr.is_zero is False:
+        return False, 'trivial'
+
+    # Nivel racional: together/cancel da una forma normal polinomial, la decisión es definitiva
+    if expr.is_rational_function() is True:
+        numerador, _ = sp.fraction(sp.cancel(sp.together(expr)))
+        return es_polinomio_nulo(numerador), 'racional'
+
+    # Nivel numérico: un valor claramente distinto de cero en algún punto prueba que no es cero
+    if _testigo_no_nulo(expr):
+        return False, 'numerico'
+
+    # Nivel trig/exp: reescribir solo si aparecen esas funciones
+    if expr.has(sp.sin, sp.cos, sp.tan, sp.cot, sp.sec, sp.csc, sp.exp):
+        try:
+            reescrita = expr.rewrite(sp.exp) if expr.has(sp.sin, sp.cos, sp.tan, sp.cot, sp.sec, sp.csc) else expr
+            if sp.cancel(sp.together(sp.expand(sp.powsimp(reescrita)))) == 0:
+                return True, 'trig_exp'
+        except Exception:
+            pass
+
+    # Último recurso: simplify completo, salvo que la expresión sea demasiado grande o tarde demasiado
+    if limitar_tamano and _costo_simplify(expr) > _limites_tamano['simplify']:
+        return None, 'tamano'
+    try:
+        with limite_de_tiempo(plazo):
+            return simplify(expr) == 0, 'simplify'
+    except TiempoAgotado:
+        return None, 'plazo'
+
+def _testigo_no_nulo(expr):
+    # Evaluación en PUNTOS_PRUEBA con el backend activo (acepta expresiones de symengine)
+    simbolos = sorted(expr.free_symbols, key=lambda s: s.name)
+    for punto in PUNTOS_PRUEBA:
+        valores = {s: punto[i % len(punto)] + sp.Rational(i // len(punto), 3)
+                   for i, s in enumerate(simbolos)}
+        evaluado = evaluar(expr, valores, TOLERANCIA_NUMERICA)
+        if evaluado is not None and abs(evaluado[0]) > evaluado[1]:
+            return True
+    return False
+
+def _costo_simplify(expr):
+    # Las pasadas trigonométricas de simplify crecen con la cantidad de funciones, no solo con el tamaño
+    return sp.count_ops(expr) * (1 + len(expr.atoms(sp.Function)))
+
+def simplificar_acotado(expr):
+    """
+    simplify si la expresión está dentro del límite de tamaño; si no, cancel/together,
+    que es mucho más barato y suficiente para reconocer cocientes racionales
+    """
+    if _costo_simplify(expr) > _limites_tamano['simplify']:
+        return sp.cancel(sp.together(expr))
+    return simplify(expr)
+
+def es_factor_integrante(M, N, mu, x, y):
+    """
+    Verifica si mu hace exacta la ecuación M dx + N dy = 0.
+    Devuelve (es_factor, nivel). Los candidatos cuya condición excede los límites de
+    tamaño se descartan (nivel 'tamano') y quedan anotados con el motivo.
+    """
+    condicion = condicion_exactitud(M, N, mu, x, y)
+    if es_nativa(condicion):
+        # Con symengine, la mayoría de los candidatos se descarta con un testigo numérico sin volver a sympy
+        if _testigo_no_nulo(condicion):
+            _registro_niveles['numerico'] += 1
+            return False, 'numerico'
+        condicion = a_sympy(condicion)
+    operaciones = sp.count_ops(condicion)
+    if operaciones > _limites_tamano['candidato']:
+        _candidatos_omitidos.append((str(mu), f"{operaciones} operaciones > límite {_limites_tamano['candidato']}"))
+        _registro_niveles['tamano'] += 1
+        return False, 'tamano'
+    es_factor, nivel = es_cero(condicion, limitar_tamano=True)
+    if nivel == 'tamano':
+        _candidatos_omitidos.append((str(mu), f"sin decidir: simplify omitido ({operaciones} operaciones)"))
+    return es_factor, nivel
+
+def probar_familia(M, N, x, y, candidatos, criba=None):
+    """
+    Primer candidato de la familia (Candidato de biblioteca_factores) que hace exacta
+    la ecuación, o None. Con una criba, los candidatos que ésta descarta no se prueban.
+    """
+    for candidato in candidatos:
+        if criba is not None and criba.descarta(candidato):
+            _registro_niveles['criba'] += 1
+            continue
+        try:
+            if es_factor_integrante(M, N, candidato.mu, x, y)[0]:
+                return candidato
+        except Exception:
+            continue
+    return None
+
+FUNCIONES_TRIG = frozenset({'sin', 'cos', 'tan', 'cot', 'sec', 'csc'})
+
+def caracteristicas_ecuacion(M, N, x, y):
+    """
+    Firma de la ecuación en una sola pasada por el árbol de M y N: funciones presentes,
+    si es polinomial o racional, grados y variables que aparecen en los denominadores.
+    """
+    funciones = set()
+    denominadores = {'M': set(), 'N': set()}
+    es_racional = es_polinomial = True
+    for parte, expr in (('M', M), ('N', N)):
+        for nodo in sp.preorder_traversal(expr):
+            if isinstance(nodo, sp.Function):
+                funciones.add(nodo.func.__name__)
+                if nodo.has(x, y):
+                    es_racional = es_polinomial = False
+            elif isinstance(nodo, sp.Pow) and nodo.has(x, y):
+                if not nodo.exp.is_Integer or nodo.exp.has(x, y):
+                    es_racional = es_polinomial = False
+                if nodo.exp.could_extract_minus_sign():
+                    es_polinomial = False
+                    denominadores[parte] |= nodo.base.free_symbols & {x, y}
+
+    grados = None
+    if es_polinomial:
+        grados = tuple(sp.Poly(expr, x, y).total_degree() if expr != 0 else 0 for expr in (M, N))
+    return {
+        'funciones': frozenset(funciones),
+        'es_polinomial': es_polinomial,
+        'es_racional': es_racional,
+        'grados': grados,
+        'denominadores': {parte: frozenset(v) for parte, v in denominadores.items()},
+    }
+
+# Índice de familias de candidatos: qué firma necesita la ecuación para que la familia pueda aplicar.
+# Un factor con sen/cos solo compensa términos con sen/cos; el ansatz polinomial exige una
+# ecuación racional. Ningún rasgo de la firma descarta las familias racionales especiales
+# (1/(1+xy²), x^n que elimina singularidades): ni la falta de denominadores ni las funciones
+# trascendentes, pues (1+xy²)·sen(x)dx + (1+xy²)dy = 0 necesita μ = 1/(1+xy²). La criba
+# numérica las descarta sin cálculo simbólico.
+FAMILIAS_CANDIDATOS = {
+    'trigonometrica': lambda c: bool(c['funciones'] & FUNCIONES_TRIG),
+    'racional': lambda c: True,
+    'ansatz': lambda c: c['es_racional'],
+}
+
+def familias_aplicables(caracteristicas):
+    """
+    Nombres de las familias de FAMILIAS_CANDIDATOS compatibles con la firma dada
+    """
+    return {nombre for nombre, requisito in FAMILIAS_CANDIDATOS.items() if requisito(caracteristicas)}
+
+class ResultadoAnalisis(Mapping):
+    """
+    Resultado de analizar_ecuacion_exacta con disposición fija (__slots__).
+    Los campos derivados (diferencia, M', N', sus derivadas, ...) se calculan la primera
+    vez que se consultan y quedan guardados. Admite acceso tipo diccionario.
+    """
+    __slots__ = (
+        'entrada', 'M', 'N', 'dM_dy', 'dN_dx', 'es_exacta', 'nivel_exactitud',
+        'factor_integrante', 'caso_factor', 'es_exacta_nueva', 'nivel_verificacion',
+        'via_rapida', 'niveles_cero', 'caracteristicas', 'familias_omitidas', 'candidatos_omitidos',
+        'parametros', 'valores_especiales',
+        '_ecuacion_original', '_diferencia', '_M_nuevo', '_N_nuevo',
+        '_dM_nuevo_dy', '_dN_nuevo_dx', '_diferencia_nueva', '_potencial', '_compilados',
+    )
+    
+    _CLAVES_BASE = ('ecuacion_original', 'M', 'N', 'dM_dy', 'dN_dx', 'diferencia',
+                    'es_exacta', 'nivel_exactitud')
+    _CLAVES_CON_FACTOR = ('factor_integrante', 'caso_factor', 'M_nuevo', 'N_nuevo',
+                          'dM_nuevo_dy', 'dN_nuevo_dx', 'diferencia_nueva', 'es_exacta_nueva',
+                          'nivel_verificacion', 'via_rapida', 'caracteristicas', 'familias_omitidas',
+                          'candidatos_omitidos')
+    _CLAVES_SIN_FACTOR = ('factor_integrante', 'caso_factor', 'via_rapida', 'caracteristicas',
+                          'familias_omitidas', 'candidatos_omitidos')
+    # Solo para familias con parámetros libres
+    _CLAVES_PARAMETROS = ('parametros', 'valores_especiales', 'potencial')
+    
+    def __init__(self, entrada, M, N, dM_dy, dN_dx, es_exacta, nivel_exactitud):
+        self.entrada = entrada
+        self.M = M
+        self.N = N
+        self.dM_dy = dM_dy
+        self.dN_dx = dN_dx
+        self.es_exacta = es_exacta
+        self.nivel_exactitud = nivel_exactitud
+        self.factor_integrante = None
+        self.caso_factor = None
+        self.es_exacta_nueva = None
+        self.nivel_verificacion = None
+        self.via_rapida = None
+        self.niveles_cero = {}
+        self.caracteristicas = None
+        self.familias_omitidas = ()
+        self.candidatos_omitidos = []
+        self.parametros = ()
+        self.valores_especiales = []
+        for campo in ResultadoAnalisis.__slots__:
+            if campo.startswith('_'):
+                setattr(self, campo, None)
+    
+    def _claves(self):
+        if self.es_exacta is not False:
+            extra = ()
+        elif self.factor_integrante is not None:
+            extra = self._CLAVES_CON_FACTOR
+        else:
+            extra = self._CLAVES_SIN_FACTOR
+        if self.parametros:
+            extra += self._CLAVES_PARAMETROS
+        return self._CLAVES_BASE + extra + ('niveles_cero',)
+    
+    def __getitem__(self, clave):
+        if clave not in self._claves():
+            raise KeyError(clave)
+        return getattr(self, clave)
     
-    # Preprocesar: quitar espacios y '=0'
+    def __contains__(self, clave):
+        return clave in self._claves()
+    
+    def __iter__(self):
+        return iter(self._claves())
+    
+    def __len__(self):
+        return len(self._claves())
+    
+    def __repr__(self):
+        return f"ResultadoAnalisis({self.entrada!r}, es_exacta={self.es_exacta}, factor_integrante={self.factor_integrante})"
+    
+    # Campos derivados, calculados al primer acceso
+    @property
+    def ecuacion_original(self):
+        if self._ecuacion_original is None:
+            self._ecuacion_original = _normalizar_ecuacion(self.entrada)
+        return self._ecuacion_original
+    
+    @property
+    def diferencia(self):
+        if self._diferencia is None:
+            if self.es_exacta:
+                self._diferencia = sp.Integer(0)
+            elif self.es_exacta is None:
+                # Sin decidir: simplify ya no alcanzó dentro del plazo
+                self._diferencia = self.dM_dy - self.dN_dx
+            else:
+                self._diferencia = simplify(self.dM_dy - self.dN_dx)
+        return self._diferencia
+    
+    @property
+    def M_nuevo(self):
+        if self._M_nuevo is None:
+            self._M_nuevo = simplify(self.M * self.factor_integrante)
+        return self._M_nuevo
+    
+    @property
+    def N_nuevo(self):
+        if self._N_nuevo is None:
+            self._N_nuevo = simplify(self.N * self.factor_integrante)
+        return self._N_nuevo
+    
+    @property
+    def dM_nuevo_dy(self):
+        if self._dM_nuevo_dy is None:
+            self._dM_nuevo_dy = diff(self.M_nuevo, symbols('y'))
+        return self._dM_nuevo_dy
+    
+    @property
+    def dN_nuevo_dx(self):
+        if self._dN_nuevo_dx is None:
+            self._dN_nuevo_dx = diff(self.N_nuevo, symbols('x'))
+        return self._dN_nuevo_dx
+    
+    @property
+    def diferencia_nueva(self):
+        if self._diferencia_nueva is None:
+            if self.es_exacta_nueva:
+                self._diferencia_nueva = sp.Integer(0)
+            else:
+                self._diferencia_nueva = simplify(self.dM_nuevo_dy - self.dN_nuevo_dx)
+        return self._diferencia_nueva
+    
+    @property
+    def potencial(self):
+        """
+        F(x, y) con dF = μ·M dx + μ·N dy (μ = 1 si la ecuación ya es exacta): la solución
+        implícita es F(x, y) = C. None si no hay factor o alguna integral no se pudo calcular.
+        """
+        if self._potencial is None:
+            x, y = symbols('x y')
+            if self.es_exacta:
+                self._potencial = funcion_potencial(self.M, self.N, x, y)
+            elif self.factor_integrante is not None and self.es_exacta_nueva:
+                self._potencial = funcion_potencial(self.M_nuevo, self.N_nuevo, x, y)
+        return self._potencial
+    
+    def compilar(self, campo='factor_integrante'):
+        """
+        Versión numérica de 'factor_integrante' o 'potencial' como f(x, y, *parametros),
+        vectorizada con numpy: x, y y los parámetros pueden ser arreglos y se combinan por
+        broadcasting, de modo que un barrido de parámetros es solo aritmética de arreglos.
+        """
+        import numpy as np
+        
+        if self._compilados is None:
+            self._compilados = {}
+        if campo not in self._compilados:
+            if campo not in ('factor_integrante', 'potencial'):
+                raise ValueError(f"Campo no compilable: {campo!r}")
+            expr = getattr(self, campo)
+            if expr is None and campo == 'factor_integrante' and self.es_exacta:
+                expr = sp.Integer(1)
+            if expr is None:
+                raise ValueError(f"El resultado no tiene {campo.replace('_', ' ')}")
+            funcion = sp.lambdify(symbols('x y') + tuple(self.parametros), expr, 'numpy')
+            
+            def vectorizada(*argumentos):
+                # Las expresiones que no dependen de algún argumento igual devuelven la forma completa
+                return funcion(*argumentos) + np.zeros(np.broadcast(*argumentos).shape)
+            self._compilados[campo] = vectorizada
+        return self._compilados[campo]
+
+def _normalizar_ecuacion(ecuacion_str):
+    # Quitar espacios y '=0', normalizar funciones
     ecuacion_str = ecuacion_str.replace(' ', '').replace('=0', '')
-    ecuacion_str = ecuacion_str.replace('sen(', 'sin(').replace('cos(', 'cos(')  # Normalizar funciones
+    return ecuacion_str.replace('sen(', 'sin(').replace('cos(', 'cos(')
+
+def parsear_ecuacion(ecuacion_str):
+    """
+    Solo interpreta la ecuación: devuelve (M, N) de M(x,y)*dx + N(x,y)*dy = 0
+    """
+    # Preprocesar: quitar espacios y '=0', normalizar funciones
+    ecuacion_str = _normalizar_ecuacion(ecuacion_str)
     
     # Patrones mejorados para capturar diferentes formatos
     patrones = [
@@ -87,6 +463,60 @@ def analizar_ecuacion_exacta(ecuacion_str):
     except Exception as e:
         raise ValueError(f"Error al procesar M='{M_str}' o N='{N_str}': {e}")
     
+    return M, N
+
+def analizar_ecuacion_exacta(ecuacion_str, grado_ansatz=GRADO_ANSATZ_MAX, clasificar=True,
+                             podar_candidatos=True, cribar=True, limites_tamano=None,
+                             plazo_exactitud=PLAZO_EXACTITUD, backend=None, parametros=None):
+    """
+    Analiza si una ecuación diferencial es exacta y encuentra factor integrante si no lo es.
+    Formato esperado: M(x,y)*dx + N(x,y)*dy = 0
+    grado_ansatz: grado máximo del factor polinomial general que se busca como último recurso
+    clasificar: si μ(x) y μ(y) no alcanzan, probar las clases con factor en forma cerrada
+        (separable, lineal, ...) antes de la búsqueda de candidatos
+    podar_candidatos: omitir las familias de candidatos incompatibles con la firma de la ecuación
+    cribar: descartar numéricamente (CribaNumerica) los candidatos de la biblioteca antes de
+        probarlos simbólicamente
+    limites_tamano: límites que reemplazan a los de LIMITES_TAMANO (p. ej. {'candidato': 500})
+    plazo_exactitud: segundos para decidir la exactitud con simplify (None: sin plazo)
+    backend: 'sympy' o 'symengine' para derivadas, productos y evaluaciones (None: el activo)
+    parametros: símbolos libres de una familia de ecuaciones ('a b', ['a', 'b'] o símbolos).
+        El análisis se hace una sola vez con los parámetros genéricos; el resultado informa
+        los valores especiales donde cambia y compila factor y potencial con
+        resultado.compilar(...) como funciones vectorizadas sobre arreglos de parámetros.
+    """
+    M, N = parsear_ecuacion(ecuacion_str)
+    return _analizar(M, N, ecuacion_str, grado_ansatz=grado_ansatz, clasificar=clasificar,
+                     podar_candidatos=podar_candidatos, cribar=cribar, limites_tamano=limites_tamano,
+                     plazo_exactitud=plazo_exactitud, backend=backend, parametros=parametros)
+
+def _analizar(M, N, entrada, backend=None, limites_tamano=None, **opciones):
+    with usando_backend(backend), _con_limites_tamano(limites_tamano):
+        return _analizar_con_backend_activo(M, N, entrada, **opciones)
+
+@contextlib.contextmanager
+def _con_limites_tamano(limites_tamano):
+    # Los límites de una llamada valen solo durante ella: los cálculos diferidos del resultado
+    # (potencial, solución implícita) y las llamadas siguientes usan los vigentes antes
+    previos = dict(_limites_tamano)
+    _limites_tamano.clear()
+    _limites_tamano.update(LIMITES_TAMANO, **(limites_tamano or {}))
+    try:
+        yield
+    finally:
+        _limites_tamano.clear()
+        _limites_tamano.update(previos)
+
+def _analizar_con_backend_activo(M, N, entrada, grado_ansatz=GRADO_ANSATZ_MAX, clasificar=True,
+                                 podar_candidatos=True, cribar=True, plazo_exactitud=PLAZO_EXACTITUD,
+                                 parametros=None):
+    x, y = symbols('x y')
+    parametros = _simbolos_parametros(parametros)
+    if parametros:
+        M, N = _con_parametros(M, N, parametros, x, y)
+    _registro_niveles.clear()
+    _candidatos_omitidos.clear()
+    
     # Calcular derivadas parciales
     try:
         dM_dy = diff(M, y)
@@ -94,58 +524,77 @@ def analizar_ecuacion_exacta(ecuacion_str):
     except Exception as e:
         raise ValueError(f"Error al calcular derivadas: {e}")
     
-    # Verificar exactitud
-    diferencia = simplify(dM_dy - dN_dx)
-    es_exacta = diferencia == 0
-    
-    resultado = {
-        'ecuacion_original': ecuacion_str,
-        'M': M,
-        'N': N,
-        'dM_dy': dM_dy,
-        'dN_dx': dN_dx,
-        'diferencia': diferencia,
-        'es_exacta': es_exacta
-    }
+    # Verificar exactitud (None: sin decidir, ningún punto de prueba mostró que no lo sea)
+    es_exacta, nivel_exactitud = es_cero(dM_dy - dN_dx, plazo=plazo_exactitud)
+    
+    resultado = ResultadoAnalisis(entrada, M, N, dM_dy, dN_dx, es_exacta, nivel_exactitud)
     
     # Si no es exacta, buscar factor integrante
-    if not es_exacta:
+    if es_exacta is False:
         factor = None
         caso_factor = None
+        via_rapida = None
+        
+        # Firma de la ecuación: decide qué familias de candidatos vale la pena probar
+        caracteristicas = caracteristicas_ecuacion(M, N, x, y)
+        aplicables = familias_aplicables(caracteristicas) if podar_candidatos else set(FAMILIAS_CANDIDATOS)
+        resultado.caracteristicas = caracteristicas
+        resultado.familias_omitidas = tuple(sorted(set(FAMILIAS_CANDIDATOS) - aplicables))
+        
+        # Candidatos precompilados y valores de la ecuación para descartarlos numéricamente
+        biblioteca = obtener_biblioteca()
+        if not cribar:
+            criba = None
+        elif parametros:
+            # Un candidato que falla con valores genéricos de los parámetros no sirve para la familia
+            genericos = _valores_genericos(parametros)
+            criba = CribaNumerica(*(e.subs(genericos) for e in (M, N, dM_dy, dN_dx)), x, y)
+        else:
+            criba = CribaNumerica(M, N, dM_dy, dN_dx, x, y)
         
         try:
             # CASO 1: Factor μ(x) - solo depende de x
-            if N != 0:  # Evitar división por cero
-                cociente_x = simplify((dM_dy - dN_dx) / N)
+            if factor is None and N != 0:  # Evitar división por cero
+                cociente_x = simplificar_acotado((dM_dy - dN_dx) / N)
                 print(f"Cociente para μ(x): (∂M/∂y - ∂N/∂x)/N = {cociente_x}")
                 # Verificar si depende solo de x
-                if cociente_x.free_symbols <= {x} and cociente_x != 0:
-                    try:
-                        integral_x = integrate(cociente_x, x)
-                        factor = exp(integral_x)
+                if y not in cociente_x.free_symbols and cociente_x != 0:
+                    factor_x = exp_de_integral(cociente_x, x)
+                    if factor_x is not None:
+                        factor = factor_x
                         caso_factor = 'μ(x)'
                         print(f"Factor μ(x) encontrado: {factor}")
-                    except Exception:
-                        pass
             
             # CASO 2: Factor μ(y) - solo depende de y
             if factor is None and M != 0:  # Evitar división por cero
-                cociente_y = simplify((dN_dx - dM_dy) / M)
+                cociente_y = simplificar_acotado((dN_dx - dM_dy) / M)
                 print(f"Cociente para μ(y): (∂N/∂x - ∂M/∂y)/M = {cociente_y}")
                 # Verificar si depende solo de y
-                if cociente_y.free_symbols <= {y} and cociente_y != 0:
-                    try:
-                        integral_y = integrate(cociente_y, y)
-                        factor = exp(integral_y)
+                if x not in cociente_y.free_symbols and cociente_y != 0:
+                    factor_y = exp_de_integral(cociente_y, y)
+                    if factor_y is not None:
+                        factor = factor_y
                         caso_factor = 'μ(y)'
                         print(f"Factor μ(y) encontrado: {factor}")
-                    except Exception:
-                        pass
+            
+            # CLASIFICACIÓN: clases de libro con factor integrante en forma cerrada
+            # (después de CASO 1/2: sus cocientes son más baratos que detectar las clases)
+            if factor is None and clasificar:
+                try:
+                    clase, factor_clase = clasificar_ecuacion(M, N, x, y)
+                    if factor_clase is not None:
+                        factor = factor_clase
+                        via_rapida = clase
+                        caso_factor = f"Clasificación ({clase}): μ = {factor_clase}"
+                        print(f"Ecuación {clase}, factor en forma cerrada: {factor_clase}")
+                except Exception as e:
+                    print(f"Error en clasificación: {e}")
+            
              # CASO 2B: Factor μ(y) mejorado - casos especiales
             if factor is None and M != 0:
                 try:
                     # Analizar estructura específica para ecuaciones polinomiales
-                    cociente_y = simplify((dN_dx - dM_dy) / M)
+                    cociente_y = simplificar_acotado((dN_dx - dM_dy) / M)
                     print(f"Cociente mejorado para μ(y): (∂N/∂x - ∂M/∂y)/M = {cociente_y}")
                     
                     # Casos especiales donde el cociente puede simplificarse
@@ -164,238 +613,50 @@ def analizar_ecuacion_exacta(ecuacion_str):
                 except Exception as e:
                     print(f"Error en análisis mejorado μ(y): {e}")
             
-            # CASO ESPECIAL: Factor μ(xy) - depende del producto xy
+            # CASO ESPECIAL: Factor μ(g(x,y)) - depende de una sustitución g (xy, x+y, x²+y², x/y, ax+by, ...)
             if factor is None:
-                # Para ecuaciones de la forma f(x,y)dx + g(x,y)dy = 0
-                # donde el factor puede ser función de xy
-                z = symbols('z')  # z = xy
                 try:
-                    # Sustituir xy por z y ver si se simplifica
-                    M_z = M.subs(x*y, z)
-                    N_z = N.subs(x*y, z)
-                    
-                    # Verificar si podemos expresar como función de z = xy
-                    cociente_xy = simplify((dM_dy - dN_dx) / N)
-                    print(f"Analizando factor μ(xy): cociente = {cociente_xy}")
-                    
-                    # Casos especiales conocidos
-                    factores_especiales_xy = [
-                         # Factores básicos
-                    (x, 'μ = x'),
-                    (y, 'μ = y'),
-                    (x*y, 'μ = xy'),
-                    (x**2, 'μ = x²'),
-                    (y**2, 'μ = y²'),
-                    (x**2 * y, 'μ = x²y'),
-                    (x * y**2, 'μ = xy²'),
-                    (x**2 * y**2, 'μ = x²y²'),
-                    
-                    # Factores racionales básicos
-                    (1/x, 'μ = 1/x'),
-                    (1/y, 'μ = 1/y'),
-                    (1/(x*y), 'μ = 1/(xy)'),
-                    (1/(x**2), 'μ = 1/x²'),
-                    (1/(y**2), 'μ = 1/y²'),
-                    (1/(x**2 * y), 'μ = 1/(x²y)'),
-                    (1/(x * y**2), 'μ = 1/(xy²)'),
-                    (1/(x**2 * y**2), 'μ = 1/(x²y²)'),
-                    
-                    # Factores para ecuaciones polinomiales específicas
-                    (1/(y**3), 'μ = 1/y³'),
-                    (1/(x**3), 'μ = 1/x³'),
-                    (1/(x * y**3), 'μ = 1/(xy³)'),
-                    (1/(x**3 * y), 'μ = 1/(x³y)'),
-                    
-                    # Combinaciones lineales
-                    ((x + y), 'μ = x + y'),
-                    ((x - y), 'μ = x - y'),
-                    (1/(x + y), 'μ = 1/(x + y)'),
-                    (1/(x - y), 'μ = 1/(x - y)'),
-                    
-                    # Factores exponenciales
-                    (exp(x), 'μ = eˣ'),
-                    (exp(y), 'μ = eʸ'),
-                    (exp(x + y), 'μ = e^(x+y)'),
-                    (exp(x - y), 'μ = e^(x-y)'),
-                    ]
-                    
-                    for mu_test, nombre in factores_especiales_xy:
-                        try:
-                            M_test = simplify(M * mu_test)
-                            N_test = simplify(N * mu_test)
-                            dM_test_dy = diff(M_test, y)
-                            dN_test_dx = diff(N_test, x)
-                            
-                            if simplify(dM_test_dy - dN_test_dx) == 0:
-                                factor = mu_test
-                                caso_factor = nombre
-                                print(f"Factor especial encontrado: {nombre}")
-                                break
-                        except Exception:
-                            continue
-                            
+                    factor_g, caso_g = buscar_factor_sustitucion(M, N, x, y)
+                    if factor_g is not None:
+                        factor = factor_g
+                        caso_factor = caso_g
+                        print(f"Factor por sustitución encontrado: {caso_g}")
                 except Exception as e:
-                    print(f"Error analizando μ(xy): {e}")
+                    print(f"Error analizando μ(g(x,y)): {e}")
             
             # CASO ESPECIAL PARA ECUACIONES RACIONALES
-            if factor is None:
-                try:
-                    # Para ecuaciones de la forma P(x,y)/Q(x,y) dx + R(x,y)/S(x,y) dy = 0
-                    # El factor integrante puede ser una función racional
-                    
-                    # Analizar la estructura de M y N
-                    print(f"Estructura de M: {M}, tipo: {type(M)}")
-                    print(f"Estructura de N: {N}, tipo: {type(N)}")
-                    
-                    # Para el caso específico (1/x)dx - (1+xy²)dy = 0
-                    # Probar factores racionales comunes
-                    factores_racionales = [
-                        (x, 'μ = x'),
-                        (x**2, 'μ = x²'),
-                        (1/(1 + x*y**2), 'μ = 1/(1+xy²)'),
-                        (x/(1 + x*y**2), 'μ = x/(1+xy²)'),
-                        ((1 + x*y**2)/x, 'μ = (1+xy²)/x'),
-                    ]
-                    
-                    for mu_test, nombre in factores_racionales:
-                        try:
-                            M_test = simplify(M * mu_test)
-                            N_test = simplify(N * mu_test)
-                            dM_test_dy = diff(M_test, y)
-                            dN_test_dx = diff(N_test, x)
-                            
-                            diferencia_test = simplify(dM_test_dy - dN_test_dx)
-                            print(f"Probando {nombre}: diferencia = {diferencia_test}")
-                            
-                            if diferencia_test == 0:
-                                factor = mu_test
-                                caso_factor = nombre
-                                print(f"Factor racional encontrado: {nombre}")
-                                break
-                        except Exception as e:
-                            print(f"Error probando {nombre}: {e}")
-                            continue
-                            
-                except Exception as e:
-                    print(f"Error buscando factores racionales: {e}")
+            # Para ecuaciones de la forma P(x,y)/Q(x,y) dx + R(x,y)/S(x,y) dy = 0
+            # el factor integrante puede ser una función racional, como en (1/x)dx - (1+xy²)dy = 0
+            if factor is None and 'racional' in aplicables:
+                candidato = probar_familia(M, N, x, y, biblioteca['racionales'], criba)
+                if candidato is not None:
+                    factor, caso_factor = candidato.mu, candidato.nombre
+                    print(f"Factor racional encontrado: {candidato.nombre}")
             
             # CASO 3: Factores especiales comunes (ampliado)
             if factor is None:
-                factores_especiales = [
-                    (x, 'μ = x'),
-                    (y, 'μ = y'),
-                    (x*y, 'μ = xy'),
-                    (x**2, 'μ = x²'),
-                    (y**2, 'μ = y²'),
-                    (x**2 * y, 'μ = x²y'),
-                    (x * y**2, 'μ = xy²'),
-                    (x**2 * y**2, 'μ = x²y²'),
-                    (1/x, 'μ = 1/x'),
-                    (1/y, 'μ = 1/y'),
-                    (1/(x*y), 'μ = 1/(xy)'),
-                    (1/(x**2), 'μ = 1/x²'),
-                    (1/(y**2), 'μ = 1/y²'),
-                    (1/(x**2 * y), 'μ = 1/(x²y)'),
-                    (1/(x * y**2), 'μ = 1/(xy²)'),
-                    ((x + y), 'μ = x + y'),
-                    ((x - y), 'μ = x - y'),
-                    (1/(x + y), 'μ = 1/(x + y)'),
-                    (1/(x - y), 'μ = 1/(x - y)'),
-                    (exp(x), 'μ = eˣ'),
-                    (exp(y), 'μ = eʸ'),
-                    (exp(x + y), 'μ = e^(x+y)'),
-                    (exp(x - y), 'μ = e^(x-y)'),
-                ]
-                
-                for mu_test, nombre in factores_especiales:
-                    try:
-                        M_test = simplify(M * mu_test)
-                        N_test = simplify(N * mu_test)
-                        dM_test_dy = diff(M_test, y)
-                        dN_test_dx = diff(N_test, x)
-                        
-                        if simplify(dM_test_dy - dN_test_dx) == 0:
-                            factor = mu_test
-                            caso_factor = nombre
-                            break
-                    except Exception:
-                        continue
+                candidato = probar_familia(M, N, x, y, biblioteca['especiales'], criba)
+                if candidato is not None:
+                    factor, caso_factor = candidato.mu, candidato.nombre
             
-            # CASO 4: Factor integrante de la forma μ = x^m * y^n (método sistemático mejorado)
+            # CASO 4: Factor integrante de la forma μ = x^m * y^n (m, n de -3 a 3)
             if factor is None:
-                try:
-                    # Intentar diferentes combinaciones de exponentes
-                    for m_test in range(-3, 4):  # m de -3 a 3
-                        for n_test in range(-3, 4):  # n de -3 a 3
-                            if m_test == 0 and n_test == 0:
-                                continue
-                            
-                            # Crear factor de prueba con manejo de casos especiales
-                            if m_test < 0 or n_test < 0:
-                                # Para factores con exponentes negativos, usar 1/(x^|m| * y^|n|)
-                                if m_test < 0 and n_test < 0:
-                                    mu_test = 1/((x**abs(m_test)) * (y**abs(n_test)))
-                                elif m_test < 0:
-                                    mu_test = (y**n_test)/((x**abs(m_test)))
-                                else:  # n_test < 0
-                                    mu_test = (x**m_test)/((y**abs(n_test)))
-                            else:
-                                mu_test = (x**m_test) * (y**n_test)
-                            
-                            try:
-                                M_test = simplify(M * mu_test)
-                                N_test = simplify(N * mu_test)
-                                dM_test_dy = diff(M_test, y)
-                                dN_test_dx = diff(N_test, x)
-                                
-                                if simplify(dM_test_dy - dN_test_dx) == 0:
-                                    factor = mu_test
-                                    caso_factor = f'μ = {mu_test}'
-                                    print(f"Factor sistemático encontrado: {mu_test}")
-                                    break
-                            except Exception:
-                                continue
-                        
-                        if factor is not None:
-                            break
-                            
-                except Exception as e:
-                    print(f"Error en búsqueda sistemática mejorada: {e}")
+                candidato = probar_familia(M, N, x, y, biblioteca['monomios'], criba)
+                if candidato is not None:
+                    factor, caso_factor = candidato.mu, candidato.nombre
+                    print(f"Factor sistemático encontrado: {candidato.mu}")
             
             # CASO 5: Verificar factores de la forma f(ax + by)
             if factor is None:
-                try:
-                    # Probar algunos factores especiales basados en combinaciones lineales
-                    combinaciones = [
-                        (x + y, 'μ = (x + y)'),
-                        (x - y, 'μ = (x - y)'),
-                        (x + 2*y, 'μ = (x + 2y)'),
-                        (2*x + y, 'μ = (2x + y)'),
-                        (x**2 + y**2, 'μ = (x² + y²)'),
-                        (x**2 - y**2, 'μ = (x² - y²)'),
-                    ]
-                    
-                    for combinacion, nombre in combinaciones:
-                        try:
-                            M_test = simplify(M * combinacion)
-                            N_test = simplify(N * combinacion)
-                            dM_test_dy = diff(M_test, y)
-                            dN_test_dx = diff(N_test, x)
-                            
-                            if simplify(dM_test_dy - dN_test_dx) == 0:
-                                factor = combinacion
-                                caso_factor = nombre
-                                break
-                        except Exception:
-                            continue
-                            
-                except Exception as e:
-                    print(f"Error buscando factores de combinación lineal: {e}")
+                candidato = probar_familia(M, N, x, y, biblioteca['combinaciones'], criba)
+                if candidato is not None:
+                    factor, caso_factor = candidato.mu, candidato.nombre
             
             # CASO 6: Análisis especial para ecuaciones racionales
-            if factor is None:
+            if factor is None and 'racional' in aplicables:
                 try:
-                    factor_especial, caso_especial = analizar_caso_especial_racional(M, N, x, y)
+                    factor_especial, caso_especial = analizar_caso_especial_racional(
+                        M, N, x, y, caracteristicas['denominadores'])
                     if factor_especial is not None:
                         factor = factor_especial
                         caso_factor = caso_especial
@@ -405,95 +666,472 @@ def analizar_ecuacion_exacta(ecuacion_str):
             # CASO 7: Usar método avanzado para factores complejos
             if factor is None:
                 try:
-                    factor_avanzado, caso_avanzado = buscar_factor_integrante_avanzado(M, N, x, y)
+                    factor_avanzado, caso_avanzado = buscar_factor_integrante_avanzado(
+                        M, N, x, y, factores_trig='trigonometrica' in aplicables, criba=criba)
                     if factor_avanzado is not None:
                         factor = factor_avanzado
                         caso_factor = f"Avanzado: μ = {caso_avanzado}"
                 except Exception as e:
                     print(f"Error en método avanzado: {e}")
             # CASO 8: Análisis específico para ecuaciones trigonométricas
-            if factor is None:
+            if factor is None and 'trigonometrica' in aplicables:
                 try:
-                    # Detectar si hay funciones trigonométricas
-                    if any(func in str(M) + str(N) for func in ['sin', 'cos', 'tan']):
-                        factor_trig, caso_trig = analizar_ecuacion_trigonometrica(M, N, x, y)
-                        if factor_trig is not None:
-                            factor = factor_trig
-                            caso_factor = f"Trigonométrico: {caso_trig}"
+                    factor_trig, caso_trig = analizar_ecuacion_trigonometrica(M, N, x, y, criba)
+                    if factor_trig is not None:
+                        factor = factor_trig
+                        caso_factor = f"Trigonométrico: {caso_trig}"
                 except Exception as e:
                     print(f"Error en análisis trigonométrico: {e}")
             # CASO 9: Análisis específico para ecuaciones polinomiales
             if factor is None:
                 try:
                     # Detectar si tenemos ecuaciones polinomiales complejas
-                    factor_poli, caso_poli = analizar_ecuacion_polinomial(M, N, x, y)
+                    factor_poli, caso_poli = analizar_ecuacion_polinomial(M, N, x, y, criba)
                     if factor_poli is not None:
                         factor = factor_poli
                         caso_factor = f"Polinomial: {caso_poli}"
                 except Exception as e:
                     print(f"Error en análisis polinomial: {e}")
+            # CASO 10: Factor polinomial general (ansatz) resuelto por álgebra lineal exacta
+            if factor is None and grado_ansatz is not None and 'ansatz' in aplicables:
+                try:
+                    factor_ansatz, caso_ansatz = buscar_factor_ansatz(M, N, x, y, grado_max=grado_ansatz)
+                    if factor_ansatz is not None:
+                        factor = factor_ansatz
+                        caso_factor = f"Ansatz: {caso_ansatz}"
+                except Exception as e:
+                    print(f"Error en ansatz polinomial: {e}")
         
         except Exception as e:
             print(f"Error buscando factor integrante: {e}")
         
-        # Verificar ecuación transformada
+        resultado.factor_integrante = factor
+        resultado.caso_factor = caso_factor if factor is not None else 'No encontrado con métodos básicos'
+        resultado.via_rapida = via_rapida
+        
+        # Verificar ecuación transformada (M', N' y sus derivadas se calculan al consultarlas)
         if factor is not None:
             try:
-                M_nuevo = simplify(M * factor)
-                N_nuevo = simplify(N * factor)
-                dM_nuevo_dy = diff(M_nuevo, y)
-                dN_nuevo_dx = diff(N_nuevo, x)
-                es_exacta_nueva = simplify(dM_nuevo_dy - dN_nuevo_dx) == 0
-                
-                resultado.update({
-                    'factor_integrante': factor,
-                    'caso_factor': caso_factor,
-                    'M_nuevo': M_nuevo,
-                    'N_nuevo': N_nuevo,
-                    'dM_nuevo_dy': dM_nuevo_dy,
-                    'dN_nuevo_dx': dN_nuevo_dx,
-                    'diferencia_nueva': simplify(dM_nuevo_dy - dN_nuevo_dx),
-                    'es_exacta_nueva': es_exacta_nueva
-                })
+                resultado.es_exacta_nueva, resultado.nivel_verificacion = es_factor_integrante(M, N, factor, x, y)
             except Exception as e:
                 print(f"Error verificando ecuación transformada: {e}")
-        else:
-            resultado.update({
-                'factor_integrante': None,
-                'caso_factor': 'No encontrado con métodos básicos'
-            })
+                resultado.es_exacta_nueva = False
     
+    if parametros:
+        resultado.parametros = parametros
+        try:
+            resultado.valores_especiales = _valores_especiales(resultado, parametros, x, y)
+        except Exception as e:
+            print(f"Error buscando valores especiales de los parámetros: {e}")
+    
+    resultado.niveles_cero = dict(_registro_niveles)
+    if es_exacta is False:
+        resultado.candidatos_omitidos = list(_candidatos_omitidos)
     return resultado
 
-def obtener_edo_explicita(ecuacion_str):
+def _simbolos_parametros(parametros):
+    # 'a b', 'a, b', ['a', 'b'] o símbolos -> tupla de símbolos
+    if not parametros:
+        return ()
+    if isinstance(parametros, str):
+        parametros = parametros.replace(',', ' ').split()
+    simbolos = tuple(p if isinstance(p, sp.Symbol) else sp.Symbol(str(p)) for p in parametros)
+    if set(simbolos) & set(symbols('x y')):
+        raise ValueError("x e y son las variables de la ecuación, no pueden ser parámetros")
+    return simbolos
+
+def _con_parametros(M, N, parametros, x, y):
+    # Usa los símbolos declarados (con sus supuestos, p. ej. positive=True) en lugar de los del parser
+    M, N = (sp.sympify(e).subs({sp.Symbol(p.name): p for p in parametros}) for e in (M, N))
+    no_declarados = (M.free_symbols | N.free_symbols) - {x, y} - set(parametros)
+    if no_declarados:
+        nombres = ', '.join(sorted(s.name for s in no_declarados))
+        raise ValueError(f"Símbolos no declarados como parámetros: {nombres}")
+    return M, N
+
+def _valores_genericos(parametros):
+    # Racionales "sin estructura", distintos para cada parámetro
+    return {p: sp.Rational(37 + 6*i, 23 + 4*i) for i, p in enumerate(parametros)}
+
+def funcion_potencial(P, Q, x, y):
     """
-    Convierte M*dx + N*dy = 0 a dy/dx = -M/N
+    F(x, y) con ∂F/∂x = P y ∂F/∂y = Q para una ecuación exacta P dx + Q dy = 0:
+    F = ∫P dx + ∫(Q - ∂/∂y ∫P dx) dy. Devuelve None si alguna integral no se pudo calcular.
     """
+    F_x = _rama_generica(integrar(sp.powsimp(sp.expand(P)), x), x, y)
+    if F_x is None:
+        return None
+    resto = simplificar_acotado(Q - diff(F_x, y))
+    if x in resto.free_symbols:
+        # En una ecuación exacta el resto depende solo de y: basta con fijar x
+        if not es_cero(diff(resto, x))[0]:
+            return None
+        resto = simplificar_acotado(resto.subs(x, 1))
+    G = _rama_generica(integrar(sp.powsimp(sp.expand(resto)), y), x, y)
+    if G is None:
+        return None
+    return F_x + G
+
+def _rama_generica(expr, x, y):
+    # Con parámetros, sympy.integrate devuelve un Piecewise por casos (a = 0, a = ±i, ...):
+    # se toma la rama válida para valores genéricos; los casos especiales quedan como denominadores
+    if expr is None or not expr.has(sp.Piecewise):
+        return expr
+    parametros = sorted(expr.free_symbols - {x, y}, key=lambda s: s.name)
+    genericos = _valores_genericos(parametros)
+    
+    def rama(pieza):
+        for valor, condicion in pieza.args:
+            if condicion.subs(genericos) == sp.true:
+                return valor
+        return pieza
+    return expr.replace(lambda e: isinstance(e, sp.Piecewise), rama)
+
+def _valores_especiales(resultado, parametros, x, y):
+    """
+    Valores de los parámetros donde cambia el resultado genérico de una familia: M o N
+    se anulan, la ecuación pasa a ser exacta, el factor integrante se anula o no está
+    definido, o la función potencial cambia de forma (x^(a+1)/(a+1) pasa a log(x) en a = -1).
+    Devuelve una lista de {'valores': {parámetro: valor}, 'motivo': texto}.
+    """
+    especiales = []
+    
+    def agregar(soluciones, motivo):
+        # Cada valor se informa una vez, con el primer motivo encontrado
+        for valores in soluciones:
+            if all(e['valores'] != valores for e in especiales):
+                especiales.append({'valores': valores, 'motivo': motivo})
+    
+    # M ≡ 0 o N ≡ 0, y exactitud: todos los coeficientes (en x, y) se anulan a la vez
+    for nombre, parte in (('M', resultado.M), ('N', resultado.N)):
+        agregar(_resolver_parametros(_coeficientes_en_x_y(parte, x, y), parametros),
+                f'la ecuación degenera ({nombre} = 0)')
+    if resultado.es_exacta is False:
+        diferencia = resultado.dM_dy - resultado.dN_dx
+        soluciones = _resolver_parametros(_coeficientes_en_x_y(diferencia, x, y), parametros)
+        agregar([v for v in soluciones if es_cero(diferencia.subs(v))[0]], 'la ecuación es exacta (μ = 1)')
+    
+    if resultado.factor_integrante is not None:
+        for condicion in _condiciones_parametros(resultado.factor_integrante, x, y, numerador=True):
+            agregar(_resolver_parametros([condicion], parametros), 'el factor integrante se anula o no está definido')
+    
+    potencial = resultado.potencial
+    if potencial is not None:
+        for condicion in _condiciones_parametros(potencial, x, y, numerador=False):
+            agregar(_resolver_parametros([condicion], parametros), 'la función potencial cambia de forma')
+    return especiales
+
+def _coeficientes_en_x_y(expr, x, y):
+    # Coeficientes (solo con parámetros) del numerador de expr visto como polinomio en x, y
+    # y en las funciones de x, y que aparezcan; [] si no tiene esa forma
+    numerador, _ = sp.fraction(sp.cancel(sp.together(expr)))
+    try:
+        generadores = [g for g in sp.Poly(numerador).gens if g.has(x, y)]
+        if not generadores:
+            return [numerador]
+        return sp.Poly(numerador, *generadores).coeffs()
+    except (sp.PolynomialError, sp.GeneratorsNeeded):
+        return []
+
+def _condiciones_parametros(expr, x, y, numerador):
+    # Factores que solo dependen de los parámetros en el denominador (y, si se pide, en el numerador)
+    # de expr y en los denominadores de exponentes como x^(3/k) o e^(x/a)
+    arriba, abajo = sp.fraction(sp.together(expr))
+    partes = [abajo, arriba] if numerador else [abajo]
+    for potencia in expr.atoms(sp.Pow, sp.exp):
+        exponente = potencia.exp if isinstance(potencia, sp.Pow) else potencia.args[0]
+        if exponente.free_symbols - {x, y}:
+            partes.append(sp.fraction(sp.together(exponente))[1])
+    condiciones = []
+    for parte in partes:
+        for factor in sp.Mul.make_args(sp.factor(parte)):
+            base, _ = factor.as_base_exp()
+            if base.free_symbols and not base.has(x, y):
+                condiciones.append(base)
+    return condiciones
+
+def _resolver_parametros(ecuaciones, parametros):
+    # Soluciones reales {parámetro: valor} del sistema; [] si sympy no puede resolverlo
     try:
-        resultado = analizar_ecuacion_exacta(ecuacion_str)
-        M = resultado['M']
-        N = resultado['N']
+        soluciones = solve(ecuaciones, parametros, dict=True)
+    except (NotImplementedError, ValueError, TypeError):
+        return []
+    return [s for s in soluciones if s and all(v.is_real is not False for v in s.values())]
+
+def obtener_forma_explicita(ecuacion_str, compilar=False):
+    """
+    Vía rápida que solo interpreta la ecuación, sin buscar factor integrante.
+    Devuelve (M, N, f) con f = -M/N simbólica, o compilada como f(x, y) si compilar=True.
+    f es None si N = 0.
+    """
+    M, N = parsear_ecuacion(ecuacion_str)
+    return M, N, _forma_explicita(M, N, compilar)
+
+def _forma_explicita(M, N, compilar):
+    if N == 0:
+        return None
+    forma = -M/N
+    if compilar:
+        return sp.lambdify(symbols('x y'), forma)
+    return forma
+
+class SesionAnalisis:
+    """
+    Comparte una sola interpretación de la ecuación entre la forma explícita,
+    el resultado del análisis de exactitud y el lado derecho numérico dy/dx = f(x, y).
+    Cada parte se calcula la primera vez que se pide.
+    """
+    __slots__ = ('ecuacion', 'M', 'N', 'opciones', '_resultado', '_forma_explicita', '_rhs_numerico',
+                 '_solucion_implicita')
+    
+    def __init__(self, ecuacion_str, **opciones):
+        self.ecuacion = ecuacion_str
+        self.M, self.N = parsear_ecuacion(ecuacion_str)
+        self.opciones = opciones
+        self._resultado = None
+        self._forma_explicita = None
+        self._rhs_numerico = None
+        self._solucion_implicita = None
+    
+    @property
+    def resultado(self):
+        if self._resultado is None:
+            self._resultado = _analizar(self.M, self.N, self.ecuacion, **self.opciones)
+        return self._resultado
+    
+    @property
+    def forma_explicita(self):
+        if self._forma_explicita is None:
+            self._forma_explicita = _forma_explicita(self.M, self.N, compilar=False)
+        return self._forma_explicita
+    
+    @property
+    def rhs_numerico(self):
+        if self._rhs_numerico is None:
+            if self.N == 0:
+                raise ValueError("La ecuación no puede expresarse como dy/dx = f(x, y) (N = 0)")
+            self._rhs_numerico = sp.lambdify(symbols('x y'), self.forma_explicita)
+        return self._rhs_numerico
+    
+    @property
+    def edo_explicita(self):
+        return _texto_edo_explicita(self.M, self.N)
+    
+    @property
+    def solucion_implicita(self):
+        """
+        SolucionImplicita de F(x, y) = C: y(x) sin integrar la EDO.
+        ValueError si el análisis no encontró la función potencial.
+        """
+        if self._solucion_implicita is None:
+            from solucion_explicita import SolucionImplicita
+            self._solucion_implicita = SolucionImplicita(self.resultado)
+        return self._solucion_implicita
+    
+    def punto_singular(self, x0, y0):
+        """
+        True si dy/dx = -M/N no está definida (o no es finita) en (x0, y0)
+        """
+        import numpy as np
         
-        if N == 0:
-            return "dy/dx = ∞ (ecuación no puede expresarse en forma explícita)"
+        with np.errstate(divide='ignore', invalid='ignore'):
+            try:
+                pendiente = np.ravel(self.rhs_numerico(x0, np.array([y0], dtype=float)))[0]
+            except (ZeroDivisionError, ValueError, OverflowError, TypeError):
+                return True
+        return not np.isfinite(pendiente)
+    
+    def resolver_numericamente(self, x0, y0, xf, n_puntos=200, adaptativo=False, eventos=None,
+                               max_evaluaciones=None):
+        """
+        Integra dy/dx = -M/N desde (x0, y0) hasta xf con solve_ivp (RK45).
+        Devuelve el objeto solución de scipy.
+        Con adaptativo=True la salida densa se muestrea según la curvatura y se reduce
+        (LTTB) a lo sumo n_puntos: sol.t y sol.y quedan listos para graficar.
+        eventos: eventos de solve_ivp (p. ej. uno terminal para detener la integración)
+        max_evaluaciones: tope de evaluaciones de f; al agotarse se lanza EvaluacionesAgotadas
+        """
+        import numpy as np
+        from scipy.integrate import solve_ivp
         
-        return f"dy/dx = -({M})/({N})"
+        f = self.rhs_numerico
+        if max_evaluaciones is not None:
+            f = _rhs_acotado(f, max_evaluaciones)
+        if adaptativo:
+            from muestreo_adaptativo import muestrear_para_graficar
+            sol = solve_ivp(f, (x0, xf), [y0], method='RK45', dense_output=True, events=eventos)
+            sol.t, y = muestrear_para_graficar(sol, pixeles=n_puntos)
+            sol.y = y[np.newaxis, :]
+            return sol
+        x_eval = np.linspace(x0, xf, n_puntos)
+        return solve_ivp(f, (x0, xf), [y0], t_eval=x_eval, method='RK45', events=eventos)
+    
+    def curva_por_punto(self, x0, y0, x_min, x_max, n_puntos=200, limite_y=None, pendiente_maxima=None):
+        """
+        Curva solución que pasa por (x0, y0), integrada hacia atrás hasta x_min y hacia
+        adelante hasta x_max (muestreo adaptativo, a lo sumo n_puntos por tramo).
+        Cada tramo se detiene al salir de limite_y=(y_min, y_max) o cuando |dy/dx| supera
+        pendiente_maxima: cerca de una tangente vertical el integrador avanza muy lento.
+        Devuelve (x, y, mensajes) con x creciente; mensajes explica los tramos que fallaron.
+        Un tramo que supera MAX_EVALUACIONES_CURVA evaluaciones de dy/dx se descarta con un mensaje.
+        ValueError si (x0, y0) es un punto singular.
+        """
+        import numpy as np
+        
+        if self.punto_singular(x0, y0):
+            raise ValueError(f"({x0:g}, {y0:g}) es un punto singular: dy/dx no está definida")
+        f = self.rhs_numerico
+        tramos = []
+        mensajes = []
+        for xf in (x_min, x_max):
+            if xf == x0:
+                tramos.append((np.array([x0]), np.array([y0])))
+                continue
+            eventos = []
+            if limite_y is not None:
+                def fuera_de_rango(x, y):
+                    return min(y[0] - limite_y[0], limite_y[1] - y[0])
+                eventos.append(fuera_de_rango)
+            if pendiente_maxima is not None:
+                def pendiente_excesiva(x, y):
+                    return pendiente_maxima - abs(float(np.ravel(f(x, np.asarray(y, dtype=float)))[0]))
+                eventos.append(pendiente_excesiva)
+            for evento in eventos:
+                evento.terminal = True
+            
+            try:
+                with np.errstate(divide='ignore', invalid='ignore'):  # los puntos singulares se informan en mensajes
+                    sol = self.resolver_numericamente(x0, y0, xf, n_puntos, adaptativo=True, eventos=eventos or None,
+                                                      max_evaluaciones=MAX_EVALUACIONES_CURVA)
+            except EvaluacionesAgotadas as e:
+                mensajes.append(str(e))
+                tramos.append((np.array([x0]), np.array([y0])))
+                continue
+            if not sol.success:
+                mensajes.append(sol.message)
+            tramos.append((sol.t, sol.y[0]))
+        (x_atras, y_atras), (x_adelante, y_adelante) = tramos
+        # El tramo hacia atrás va de x0 a x_min: se invierte y se une sin repetir (x0, y0)
+        x = np.concatenate((x_atras[::-1], x_adelante[1:]))
+        y = np.concatenate((y_atras[::-1], y_adelante[1:]))
+        return x, y, mensajes
+
+class EvaluacionesAgotadas(Exception):
+    """La integración superó el tope de evaluaciones de dy/dx"""
+
+def _rhs_acotado(f, max_evaluaciones):
+    # Con un paso NaN (p. ej. tras un valor infinito) RK45 no termina nunca por sí solo
+    evaluaciones = 0
+    def acotado(x, y):
+        nonlocal evaluaciones
+        evaluaciones += 1
+        if evaluaciones > max_evaluaciones:
+            raise EvaluacionesAgotadas(f"integración detenida: más de {max_evaluaciones} evaluaciones de dy/dx")
+        return f(x, y)
+    return acotado
+
+def obtener_edo_explicita(ecuacion_str):
+    """
+    Convierte M*dx + N*dy = 0 a dy/dx = -M/N
+    """
+    try:
+        M, N = parsear_ecuacion(ecuacion_str)
+        return _texto_edo_explicita(M, N)
     
     except Exception as e:
         return f"Error: {e}"
 
-def analizar_caso_especial_racional(M, N, x, y):
+def _texto_edo_explicita(M, N):
+    if N == 0:
+        return "dy/dx = ∞ (ecuación no puede expresarse en forma explícita)"
+    
+    return f"dy/dx = -({M})/({N})"
+
+def clasificar_ecuacion(M, N, x, y):
+    """
+    Detecta clases de libro con factor integrante en forma cerrada:
+    separable, lineal, Bernoulli, homogénea y y·f(xy)dx + x·g(xy)dy.
+    Devuelve (clase, factor) o (None, None) si la ecuación no pertenece a ninguna.
+    """
+    if M == 0 or N == 0:
+        return None, None
+    
+    # Cada clase se detecta y verifica por turno: la primera verificada termina la búsqueda
+    for clase, mu in _factores_por_clase(M, N, x, y):
+        try:
+            if mu is None or mu.has(sp.zoo, sp.nan):
+                continue
+            _, mu = sp.factor(mu).as_coeff_Mul()
+            if es_factor_integrante(M, N, mu, x, y)[0]:
+                return clase, mu
+        except Exception:
+            continue
+    
+    return None, None
+
+def _factores_por_clase(M, N, x, y):
+    # Genera (clase, μ) para cada clase que la ecuación cumple, de la más barata de detectar a la más cara
+    def con_exponencial(integrando, resto):
+        # μ = resto·exp(∫integrando dx), o None si la integral no se pudo calcular
+        parte = exp_de_integral(integrando, x)
+        return None if parte is None else parte * resto
+    
+    # Separable: M = f(x)·g(y), N = h(x)·k(y)  =>  μ = 1/(g(y)·h(x))
+    partes_M = sp.separatevars(M, (x, y), dict=True)
+    if partes_M is not None:
+        partes_N = sp.separatevars(N, (x, y), dict=True)
+        if partes_N is not None:
+            yield 'separable', 1/(partes_M[y] * partes_N[x])
+    
+    # Lineal y Bernoulli: dy/dx = -M/N = a(x)·y + b(x)·y^n
+    coeficientes_y = _coeficientes_en_potencias_de_y(sp.cancel(-M/N), x, y)
+    if coeficientes_y is not None and 1 in coeficientes_y:
+        otros = set(coeficientes_y) - {1}
+        a = coeficientes_y[1]
+        if otros == {0}:
+            yield 'lineal', con_exponencial(-a, 1/N)
+        elif len(otros) == 1:
+            n = otros.pop()
+            yield 'bernoulli', con_exponencial((n - 1)*a, y**(-n)/N)
+    
+    # Homogénea: M y N homogéneas del mismo grado  =>  μ = 1/(xM + yN)
+    grado_M = obtener_grado_homogeneo(M, x, y)
+    if grado_M is not None and grado_M == obtener_grado_homogeneo(N, x, y):
+        yield 'homogénea', 1/(x*M + y*N)
+    
+    # y·f(xy)dx + x·g(xy)dy = 0  =>  μ = 1/(xM - yN)
+    if all(es_cero(x*diff(f, x) - y*diff(f, y))[0] for f in (sp.cancel(M/y), sp.cancel(N/x))):
+        yield 'y·f(xy), x·g(xy)', 1/(x*M - y*N)
+
+def _coeficientes_en_potencias_de_y(expr, x, y):
+    # Escribe expr como Σ c_k(x)·y^k; devuelve {k: c_k} o None si no tiene esa forma
+    coeficientes = {}
+    for termino in sp.Add.make_args(sp.expand(expr)):
+        coef, parte_y = termino.as_independent(y, as_Add=False)
+        base, k = parte_y.as_base_exp()
+        if parte_y == 1:
+            k = sp.Integer(0)
+        elif base != y or not k.is_number:
+            return None
+        coeficientes[k] = coeficientes.get(k, 0) + coef
+    return coeficientes
+
+def analizar_caso_especial_racional(M, N, x, y, denominadores=None):
     """
     Analiza casos especiales para ecuaciones con términos racionales
     como (1/x)dx - (1+xy²)dy = 0
+    denominadores: variables en los denominadores de M y N ({'M': ..., 'N': ...}),
+    tal como las da caracteristicas_ecuacion
     """
+    if denominadores is None:
+        denominadores = caracteristicas_ecuacion(M, N, x, y)['denominadores']
     dM_dy = diff(M, y)
     dN_dx = diff(N, x)
     
     print(f"\n=== ANÁLISIS ESPECIAL PARA ECUACIÓN RACIONAL ===")
     print(f"M = {M}")
     print(f"N = {N}")
-    print(f"∂M/∂y - ∂N/∂x = {simplify(dM_dy - dN_dx)}")
+    print(f"∂M/∂y - ∂N/∂x = {simplificar_acotado(dM_dy - dN_dx)}")
     
     # Caso específico: (1/x)dx - (1+xy²)dy = 0
     if str(M) == '1/x' and str(N) == '-(1 + x*y**2)':
@@ -515,47 +1153,125 @@ def analizar_caso_especial_racional(M, N, x, y):
         print(f"∂N₁/∂x = {dN_test_dx}")
         print(f"∂M₁/∂y - ∂N₁/∂x = {simplify(dM_test_dy - dN_test_dx)}")
         
-        if simplify(dM_test_dy - dN_test_dx) == 0:
+        if es_cero(dM_test_dy - dN_test_dx)[0]:
             return factor_test, "μ = x (caso racional específico)"
     
     # Método general para ecuaciones racionales
     # Probar factores que eliminen singularidades
     
     # Si M tiene términos 1/x, probar μ = x^n
-    if '1/x' in str(M):
+    if x in denominadores['M']:
         for n in range(1, 4):
             factor_test = x**n
             try:
-                M_test = simplify(M * factor_test)
-                N_test = simplify(N * factor_test)
-                dM_test_dy = diff(M_test, y)
-                dN_test_dx = diff(N_test, x)
-                
-                if simplify(dM_test_dy - dN_test_dx) == 0:
+                if es_factor_integrante(M, N, factor_test, x, y)[0]:
                     return factor_test, f"μ = x^{n} (eliminando singularidad)"
             except Exception:
                 continue
     
     # Si N tiene términos 1/y, probar μ = y^n
-    if '1/y' in str(N):
+    if y in denominadores['N']:
         for n in range(1, 4):
             factor_test = y**n
             try:
-                M_test = simplify(M * factor_test)
-                N_test = simplify(N * factor_test)
-                dM_test_dy = diff(M_test, y)
-                dN_test_dx = diff(N_test, x)
-                
-                if simplify(dM_test_dy - dN_test_dx) == 0:
+                if es_factor_integrante(M, N, factor_test, x, y)[0]:
                     return factor_test, f"μ = y^{n} (eliminando singularidad)"
             except Exception:
                 continue
     
     return None, None
 
-def buscar_factor_integrante_avanzado(M, N, x, y):
+def sustituciones_factor(x, y):
+    """
+    Biblioteca de sustituciones g(x, y) para factores de la forma μ(g)
+    """
+    return [
+        (x*y, 'xy'),
+        (x + y, 'x + y'),
+        (x - y, 'x - y'),
+        (x**2 + y**2, 'x² + y²'),
+        (x**2 - y**2, 'x² - y²'),
+        (x/y, 'x/y'),
+    ]
+
+def buscar_factor_sustitucion(M, N, x, y):
+    """
+    Busca un factor μ(g) con g de la biblioteca de sustituciones o de la familia ax + by.
+    Para cada g forma (∂M/∂y - ∂N/∂x)/(N·g_x - M·g_y), comprueba una sola vez que
+    dependa solo de g e integra dμ/μ = Q(g) dg.
+    """
+    dM_dy = diff(M, y)
+    dN_dx = diff(N, x)
+    
+    for g, nombre in sustituciones_factor(x, y):
+        try:
+            mu = _factor_de_sustitucion(M, N, dM_dy, dN_dx, g, x, y)
+            if mu is not None:
+                return mu, f"μ({nombre}) = {mu}"
+        except Exception:
+            continue
+    
+    # Familia ax + by: la condición de dependencia solo de g fija la razón a/b
+    try:
+        for g in _sustituciones_lineales(M, N, dM_dy, dN_dx, x, y):
+            mu = _factor_de_sustitucion(M, N, dM_dy, dN_dx, g, x, y)
+            if mu is not None:
+                return mu, f"μ({g}) = {mu}"
+    except Exception:
+        pass
+    
+    return None, None
+
+def _factor_de_sustitucion(M, N, dM_dy, dN_dx, g, x, y):
+    z = sp.Dummy('z')
+    denominador = N*diff(g, x) - M*diff(g, y)
+    if es_cero(denominador)[0]:
+        return None
+    cociente = sp.cancel(sp.together((dM_dy - dN_dx) / denominador))
+    if cociente == 0:
+        return None
+    
+    # Q depende solo de g si y solo si el jacobiano ∂(Q, g)/∂(x, y) es cero
+    if not es_cero(diff(cociente, x)*diff(g, y) - diff(cociente, y)*diff(g, x))[0]:
+        return None
+    
+    # Expresar Q en términos de z = g despejando y
+    soluciones = solve(Eq(g, z), y)
+    if not soluciones:
+        return None
+    cociente_z = sp.cancel(cociente.subs(y, soluciones[0]))
+    if x in cociente_z.free_symbols:
+        cociente_z = sp.cancel(simplificar_acotado(cociente_z.subs(x, 1)))
+    if cociente_z.free_symbols & {x, y}:
+        return None
+    
+    mu = exp_de_integral(cociente_z, z)
+    if mu is None:
+        return None
+    mu = mu.subs(z, g)
+    if not es_factor_integrante(M, N, mu, x, y)[0]:
+        return None
+    return mu
+
+def _sustituciones_lineales(M, N, dM_dy, dN_dx, x, y):
+    # Con g = a·x + y, el jacobiano de Q con g es racional en x, y; sus coeficientes fijan a
+    if not (M.is_rational_function(x, y) and N.is_rational_function(x, y)):
+        return []
+    a = sp.Dummy('a')
+    denominador = a*N - M
+    cociente = sp.cancel(sp.together((dM_dy - dN_dx) / denominador))
+    jacobiano = diff(cociente, x) - a*diff(cociente, y)
+    numerador, _ = sp.fraction(sp.cancel(sp.together(jacobiano)))
+    coeficientes = sp.Poly(numerador, x, y).coeffs()
+    valores = solve(coeficientes, a, dict=True)
+    return [sol[a]*x + y for sol in valores
+            if a in sol and sol[a].is_rational and sol[a] != 0]
+
+def buscar_factor_integrante_avanzado(M, N, x, y, factores_trig=True, criba=None):
     """
     Busca factores integrantes más complejos usando métodos especializados
+    factores_trig: probar también los factores e^(sen/cos) (solo útiles si hay funciones trigonométricas)
+    criba: CribaNumerica de la ecuación para descartar candidatos sin cálculo simbólico
     """
     dM_dy = diff(M, y)
     dN_dx = diff(N, x)
@@ -577,7 +1293,7 @@ def buscar_factor_integrante_avanzado(M, N, x, y):
                     # Verificar si la ecuación se satisface
                     lado_derecho = a*N/x - b*M/y if x != 0 and y != 0 else 0
                     
-                    if simplify(diferencia - lado_derecho) == 0:
+                    if es_cero(diferencia - lado_derecho)[0]:
                         mu = x**a * y**b
                         return mu, f"x^{a} * y^{b}"
                         
@@ -587,68 +1303,31 @@ def buscar_factor_integrante_avanzado(M, N, x, y):
     except Exception:
         pass
     
-    # Método 2: Factor que hace la ecuación homogénea
+    # Método 2: Ecuación homogénea, factor en forma cerrada μ = 1/(xM + yN)
     try:
-        # Si M y N son homogéneas del mismo grado, buscar factor
         grado_M = obtener_grado_homogeneo(M, x, y)
         grado_N = obtener_grado_homogeneo(N, x, y)
         
-        if grado_M is not None and grado_N is not None:
-            if grado_M == grado_N:
-                # Probar μ = 1/(x^n * y^m) para hacer exacta
-                for n in range(0, grado_M + 2):
-                    for m in range(0, grado_M + 2):
-                        try:
-                            mu = 1/(x**n * y**m) if n > 0 or m > 0 else 1
-                            M_test = simplify(M * mu)
-                            N_test = simplify(N * mu)
-                            
-                            dM_test_dy = diff(M_test, y)
-                            dN_test_dx = diff(N_test, x)
-                            
-                            if simplify(dM_test_dy - dN_test_dx) == 0:
-                                return mu, f"1/(x^{n} * y^{m})"
-                                
-                        except Exception:
-                            continue
+        if grado_M is not None and grado_M == grado_N:
+            denominador = x*M + y*N
+            if not es_cero(denominador)[0]:
+                mu = sp.cancel(1/denominador)
+                if es_factor_integrante(M, N, mu, x, y)[0]:
+                    return mu, f"1/(xM + yN) = {mu} (homogénea de grado {grado_M})"
     
     except Exception:
         pass
     
     # Método 3: Factores trigonométricos
-    try:
-        # Probar factores que involucran funciones trigonométricas
-        factores_trig = [
-            (exp(sin(x)), 'μ = e^(sin(x))'),
-            (exp(cos(x)), 'μ = e^(cos(x))'),
-            (exp(sin(y)), 'μ = e^(sin(y))'),
-            (exp(cos(y)), 'μ = e^(cos(y))'),
-            (exp(sin(x) + cos(y)), 'μ = e^(sin(x) + cos(y))'),
-            (exp(cos(x) + sin(y)), 'μ = e^(cos(x) + sin(y))'),
-            # Factores específicos para ecuaciones trigonométricas
-            (exp(sin(x) + sin(y)), 'μ = e^(sin(x) + sin(y))'),
-            (exp(cos(x) + cos(y)), 'μ = e^(cos(x) + cos(y))'),
-            (exp(sin(x) - cos(x)), 'μ = e^(sin(x) - cos(x))'),
-            (exp(cos(x) - sin(x)), 'μ = e^(cos(x) - sin(x))'),
-        ]
-        
-        for mu_test, nombre in factores_trig:
-            try:
-                M_test = simplify(M * mu_test)
-                N_test = simplify(N * mu_test)
-                dM_test_dy = diff(M_test, y)
-                dN_test_dx = diff(N_test, x)
-                
-                if simplify(dM_test_dy - dN_test_dx) == 0:
-                    return mu_test, nombre
-            except Exception:
-                continue
-    
-    except Exception:
-        pass
+    if not factores_trig:
+        return None, None
+    candidato = probar_familia(M, N, x, y, obtener_biblioteca()['trig_avanzado'], criba)
+    if candidato is not None:
+        return candidato.mu, candidato.nombre
     
     return None, None
-def analizar_ecuacion_trigonometrica(M, N, x, y):
+
+def analizar_ecuacion_trigonometrica(M, N, x, y, criba=None):
     """
     Método especializado para ecuaciones con funciones trigonométricas
     """
@@ -661,28 +1340,10 @@ def analizar_ecuacion_trigonometrica(M, N, x, y):
         print(f"M = {M}")
         print(f"N = {N}")
         
-        # Factores comunes para ecuaciones con sen/cos
-        factores_especiales = [
-            exp(sin(x)), exp(cos(x)), exp(sin(y)), exp(cos(y)),
-            exp(sin(x) + sin(y)), exp(cos(x) + cos(y)),
-            exp(sin(x) + cos(y)), exp(cos(x) + sin(y)),
-            exp(sin(x) - cos(x)), exp(cos(x) - sin(x)),
-            exp(sin(y) - cos(y)), exp(cos(y) - sin(y)),
-            # Factores racionales
-            1/(cos(x)), 1/(sin(x)), 1/(cos(y)), 1/(sin(y)),
-        ]
-        
-        for factor_test in factores_especiales:
-            try:
-                M_test = simplify(M * factor_test)
-                N_test = simplify(N * factor_test)
-                dM_test_dy = diff(M_test, y)
-                dN_test_dx = diff(N_test, x)
-                
-                if simplify(dM_test_dy - dN_test_dx) == 0:
-                    return factor_test, f"μ = {factor_test}"
-            except Exception:
-                continue
+        # Factores comunes para ecuaciones con sen/cos (exponenciales y racionales)
+        candidato = probar_familia(M, N, x, y, obtener_biblioteca()['trigonometricos'], criba)
+        if candidato is not None:
+            return candidato.mu, candidato.nombre
                 
         return None, None
         
@@ -690,7 +1351,7 @@ def analizar_ecuacion_trigonometrica(M, N, x, y):
         print(f"Error en análisis trigonométrico: {e}")
         return None, None
     
-def analizar_ecuacion_polinomial(M, N, x, y):
+def analizar_ecuacion_polinomial(M, N, x, y, criba=None):
     """
     Método especializado para ecuaciones polinomiales complejas
     """
@@ -701,7 +1362,7 @@ def analizar_ecuacion_polinomial(M, N, x, y):
         
         dM_dy = diff(M, y)
         dN_dx = diff(N, x)
-        diferencia = simplify(dM_dy - dN_dx)
+        diferencia = simplificar_acotado(dM_dy - dN_dx)
         
         print(f"∂M/∂y = {dM_dy}")
         print(f"∂N/∂x = {dN_dx}")
@@ -713,7 +1374,7 @@ def analizar_ecuacion_polinomial(M, N, x, y):
             # El cociente (∂N/∂x - ∂M/∂y)/M nos da información del factor
             
             if M != 0:
-                cociente = simplify((dN_dx - dM_dy) / M)
+                cociente = simplificar_acotado((dN_dx - dM_dy) / M)
                 print(f"Cociente (∂N/∂x - ∂M/∂y)/M = {cociente}")
                 
                 # Buscar patrones específicos
@@ -725,7 +1386,7 @@ def analizar_ecuacion_polinomial(M, N, x, y):
                     return 1/(y**3), "μ = 1/y³ (polinomial)"
                     
             if N != 0:
-                cociente = simplify((dM_dy - dN_dx) / N)
+                cociente = simplificar_acotado((dM_dy - dN_dx) / N)
                 print(f"Cociente (∂M/∂y - ∂N/∂x)/N = {cociente}")
                 
                 # Buscar patrones específicos
@@ -740,36 +1401,10 @@ def analizar_ecuacion_polinomial(M, N, x, y):
             print(f"Error en análisis de cocientes: {e}")
         
         # Método 2: Factores específicos para ecuaciones de la forma ax^m*y^n + bx^p*y^q + c
-        factores_polinomial = [
-            (1/y, 'μ = 1/y'),
-            (1/(y**2), 'μ = 1/y²'),
-            (1/(y**3), 'μ = 1/y³'),
-            (1/x, 'μ = 1/x'),
-            (1/(x**2), 'μ = 1/x²'),
-            (1/(x*y), 'μ = 1/(xy)'),
-            (1/(x*y**2), 'μ = 1/(xy²)'),
-            (1/(x**2*y), 'μ = 1/(x²y)'),
-            (x/y, 'μ = x/y'),
-            (y/x, 'μ = y/x'),
-            (x/(y**2), 'μ = x/y²'),
-            (y/(x**2), 'μ = y/x²'),
-        ]
-        
-        for factor_test, nombre in factores_polinomial:
-            try:
-                M_test = simplify(M * factor_test)
-                N_test = simplify(N * factor_test)
-                dM_test_dy = diff(M_test, y)
-                dN_test_dx = diff(N_test, x)
-                
-                diferencia_test = simplify(dM_test_dy - dN_test_dx)
-                print(f"Probando {nombre}: diferencia = {diferencia_test}")
-                
-                if diferencia_test == 0:
-                    return factor_test, f"{nombre} (método polinomial)"
-            except Exception as e:
-                print(f"Error probando {nombre}: {e}")
-                continue
+        candidato = probar_familia(M, N, x, y, obtener_biblioteca()['polinomiales'], criba)
+        if candidato is not None:
+            print(f"Factor polinomial encontrado: {candidato.nombre}")
+            return candidato.mu, f"{candidato.nombre} (método polinomial)"
         
         return None, None
         
@@ -777,29 +1412,106 @@ def analizar_ecuacion_polinomial(M, N, x, y):
         print(f"Error en análisis polinomial: {e}")
         return None, None
 
+def buscar_factor_ansatz(M, N, x, y, grado_max=GRADO_ANSATZ_MAX, grado_min=GRADO_ANSATZ_MIN):
+    """
+    Busca μ = Σ c_ij x^i y^j con grado_min <= i, j e i + j <= grado_max.
+    La condición de exactitud es lineal en los c_ij: al agrupar coeficientes queda un
+    sistema homogéneo disperso que se resuelve con aritmética racional exacta
+    (con funciones racionales de los parámetros si la ecuación los tiene).
+    """
+    if not (M.is_rational_function(x, y) and N.is_rational_function(x, y)):
+        return None, None
+    parametros = sorted((M.free_symbols | N.free_symbols) - {x, y}, key=lambda s: s.name)
+    dominio = sp.QQ.frac_field(*parametros) if parametros else sp.QQ
+    
+    # Para μ = x^i y^j: ∂(μM)/∂y - ∂(μN)/∂x = μ·(A + j·M/y - i·N/x), con A = ∂M/∂y - ∂N/∂x
+    partes = [diff(M, y) - diff(N, x), M / y, N / x]
+    fracciones = [sp.fraction(sp.cancel(sp.together(p))) for p in partes]
+    denominador = sp.lcm([den for _, den in fracciones])
+    try:
+        a, b, c = [sp.Poly(sp.cancel(num * denominador / den), x, y, domain=dominio)
+                   for num, den in fracciones]
+    except (sp.PolynomialError, sp.CoercionFailed):
+        return None, None
+    
+    exponentes = [(i, j) for i in range(grado_min, grado_max + 1)
+                  for j in range(grado_min, grado_max + 1) if i + j <= grado_max]
+    
+    # Cada incógnita aporta una columna: los coeficientes de x^(i-grado_min) y^(j-grado_min)·(a + j·b - i·c)
+    filas = {}
+    columnas = {}
+    for k, (i, j) in enumerate(exponentes):
+        termino = (a + b*j - c*i) * sp.Poly(x**(i - grado_min) * y**(j - grado_min), x, y, domain=dominio)
+        for monomio, coef in termino.as_dict().items():
+            fila = filas.setdefault(monomio, len(filas))
+            columnas.setdefault(fila, {})[k] = dominio.convert(coef)
+    if not filas:
+        return None, None
+    
+    sistema = DomainMatrix(columnas, (len(filas), len(exponentes)), dominio)
+    soluciones = sistema.nullspace().to_Matrix().tolist()
+    if not soluciones:
+        return None, None
+    
+    # Preferir la solución con menos términos
+    vector = min(soluciones, key=lambda v: sum(1 for c_ij in v if c_ij != 0))
+    mu = sp.factor(sum(c_ij * x**i * y**j for c_ij, (i, j) in zip(vector, exponentes)))
+    _, mu = mu.as_coeff_Mul()
+    if mu == 0 or not es_factor_integrante(M, N, mu, x, y)[0]:
+        return None, None
+    return mu, f"μ = {mu} (grado ≤ {grado_max})"
+
 def obtener_grado_homogeneo(expr, x, y):
     """
-    Obtiene el grado de homogeneidad de una expresión
+    Obtiene el grado de homogeneidad de una expresión (cualquier grado, incluso negativo o racional)
+    leyendo en una pasada el grado total de los términos del numerador y del denominador
     """
     try:
-        # Sustituir x -> t*x, y -> t*y y ver si sale t^n * expr
-        t = symbols('t')
-        expr_escalada = expr.subs([(x, t*x), (y, t*y)])
+        numerador, denominador = sp.fraction(sp.together(expr))
+        grados_num = _grados_totales(numerador, x, y)
+        grados_den = _grados_totales(denominador, x, y)
+        if grados_num is not None and grados_den is not None:
+            # Cociente de polinomios (exponentes numéricos): homogéneo solo si cada parte
+            # tiene un único grado total, sin necesidad de simplify
+            if len(grados_num) == 1 and len(grados_den) == 1:
+                return grados_num.pop() - grados_den.pop()
+            return None
         
-        for grado in range(0, 5):
-            if simplify(expr_escalada - t**grado * expr) == 0:
-                return grado
+        # Términos no algebraicos: una sola comparación de expr(tx, ty) con expr(x, y)
+        t = symbols('t', positive=True)
+        cociente = simplificar_acotado(expr.subs([(x, t*x), (y, t*y)]) / expr)
+        if cociente == 1:
+            return 0
+        base, grado = cociente.as_base_exp()
+        if base == t and grado.is_number:
+            return grado
         
         return None
     except Exception:
         return None
 
+def _grados_totales(expr, x, y):
+    # Grados totales de los términos de expr, o None si algún término no es un monomio en x, y
+    grados = set()
+    for termino in sp.Add.make_args(sp.expand(expr)):
+        grado = 0
+        for factor in sp.Mul.make_args(termino):
+            if not factor.has(x, y):
+                continue
+            base, exponente = factor.as_base_exp()
+            if base not in (x, y) or not exponente.is_number:
+                return None
+            grado += exponente
+        grados.add(grado)
+    return grados
+
 def mostrar_resultado(ecuacion_str):
     """
     Función auxiliar para mostrar resultados de forma ordenada
     """
     try:
-        resultado = analizar_ecuacion_exacta(ecuacion_str)
+        sesion = SesionAnalisis(ecuacion_str)
+        resultado = sesion.resultado
         
         print(f"\n=== ANÁLISIS DE: {ecuacion_str} ===")
         print(f"M(x,y) = {resultado['M']}")
@@ -810,6 +1522,9 @@ def mostrar_resultado(ecuacion_str):
         
         if resultado['es_exacta']:
             print("✅ LA ECUACIÓN ES EXACTA")
+        elif resultado['es_exacta'] is None:
+            print(f"⚠️  NO SE PUDO DECIDIR SI ES EXACTA (nivel {resultado['nivel_exactitud']}): "
+                  "ningún punto de prueba muestra que no lo sea")
         else:
             print("❌ LA ECUACIÓN NO ES EXACTA")
             
@@ -824,7 +1539,7 @@ def mostrar_resultado(ecuacion_str):
             else:
                 print(f"⚠️  Factor integrante: {resultado['caso_factor']}")
         
-        print(f"\nForma explícita: {obtener_edo_explicita(ecuacion_str)}")
+        print(f"\nForma explícita: {sesion.edo_explicita}")
         
     except Exception as e:
         print(f"Error: {e}")
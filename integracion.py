@@ -0,0 +1,178 @@
+"""
+Integración indefinida para la búsqueda de factores integrantes.
+
+Los cocientes que aparecen en μ(x), μ(y), μ(g) y en las clases lineal/Bernoulli
+suelen ser triviales (k/x, funciones racionales, sen/cos de argumento lineal),
+pero sympy.integrate puede tardar muchísimo en algunos de ellos. Este módulo:
+
+- prueba primero reglas de tabla: potencias, derivada logarítmica, fracciones
+  parciales (apart) y funciones elementales de argumento lineal,
+- guarda los resultados en una caché acotada por integrando canónico,
+- recurre a sympy.integrate solo con un plazo de tiempo,
+- simplifica exp(∫...) a un factor monomial o racional cuando es posible.
+"""
+
+import contextlib
+import signal
+import threading
+import time
+from collections import OrderedDict
+
+import sympy as sp
+
+# Plazo (segundos) para sympy.integrate cuando las reglas de tabla no alcanzan
+PLAZO_INTEGRACION = 5.0
+
+TAMANO_CACHE_INTEGRALES = 1024
+
+_cache = OrderedDict()
+_estadisticas = {'tabla': 0, 'sympy': 0, 'cache': 0, 'fallidas': 0}
+
+class TiempoAgotado(Exception):
+    """Se venció el plazo de una operación acotada con limite_de_tiempo"""
+
+@contextlib.contextmanager
+def limite_de_tiempo(segundos):
+    """
+    Interrumpe el bloque con TiempoAgotado si tarda más de `segundos`.
+    Usa SIGALRM, así que solo es efectivo en el hilo principal de plataformas que lo
+    tienen; en otro caso (o con segundos=None) el bloque corre sin límite.
+    """
+    if (segundos is None or not hasattr(signal, 'setitimer')
+            or threading.current_thread() is not threading.main_thread()):
+        yield
+        return
+
+    def agotado(signum, frame):
+        raise TiempoAgotado()
+
+    # Un límite interno nunca extiende el plazo de uno externo todavía en curso
+    restante_previo = signal.getitimer(signal.ITIMER_REAL)[0]
+    manejador_previo = signal.signal(signal.SIGALRM, agotado)
+    signal.setitimer(signal.ITIMER_REAL, min(segundos, restante_previo) if restante_previo else segundos)
+    inicio = time.monotonic()
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, manejador_previo)
+        # Un límite externo sigue corriendo con el tiempo que le quedaba
+        if restante_previo:
+            signal.setitimer(signal.ITIMER_REAL, max(restante_previo - (time.monotonic() - inicio), 1e-3))
+
+def integrar(expr, variable, plazo=PLAZO_INTEGRACION):
+    """
+    Primitiva de expr respecto de variable, o None si no se encontró
+    (ni por tabla ni con sympy.integrate dentro del plazo).
+    """
+    expr = sp.sympify(expr)
+    clave = (_forma_canonica(expr, variable), variable)
+    if clave in _cache:
+        _cache.move_to_end(clave)
+        _estadisticas['cache'] += 1
+        return _cache[clave]
+
+    primitiva = _integrar_por_tabla(clave[0], variable)
+    if primitiva is not None:
+        _estadisticas['tabla'] += 1
+    else:
+        primitiva = _integrar_con_sympy(clave[0], variable, plazo)
+        _estadisticas['sympy' if primitiva is not None else 'fallidas'] += 1
+
+    _cache[clave] = primitiva
+    if len(_cache) > TAMANO_CACHE_INTEGRALES:
+        _cache.popitem(last=False)
+    return primitiva
+
+def exp_de_integral(expr, variable, plazo=PLAZO_INTEGRACION):
+    """
+    exp(∫expr d(variable)) con los términos c·log(g) de la primitiva convertidos en g**c,
+    de modo que un cociente racional da un factor monomial o racional.
+    Devuelve None si la integral no se pudo calcular.
+    """
+    primitiva = integrar(expr, variable, plazo)
+    if primitiva is None:
+        return None
+    factores = []
+    exponente = sp.Integer(0)
+    for termino in sp.Add.make_args(sp.expand(primitiva)):
+        coeficiente, resto = termino.as_independent(sp.log, as_Add=False)
+        if isinstance(resto, sp.log):
+            factores.append(resto.args[0]**coeficiente)
+        else:
+            exponente += termino
+    return sp.Mul(*factores) * sp.exp(exponente)
+
+def estadisticas_integracion():
+    """
+    Cuántas integrales se resolvieron por tabla, con sympy, desde la caché o fallaron
+    """
+    return dict(_estadisticas, en_cache=len(_cache))
+
+def limpiar_cache_integrales():
+    _cache.clear()
+
+def _forma_canonica(expr, variable):
+    # Las funciones racionales se llevan a un cociente cancelado: mismos integrandos, misma clave
+    if expr.is_rational_function(variable) is True:
+        return sp.cancel(sp.together(expr))
+    return expr
+
+def _integrar_con_sympy(expr, variable, plazo):
+    try:
+        with limite_de_tiempo(plazo):
+            primitiva = sp.integrate(expr, variable)
+    except TiempoAgotado:
+        return None
+    except Exception:
+        return None
+    return None if primitiva.has(sp.Integral) else primitiva
+
+def _es_lineal(expr, variable):
+    return expr.is_polynomial(variable) and sp.degree(expr, variable) == 1
+
+def _integrar_por_tabla(expr, variable):
+    if not expr.has(variable):
+        return expr * variable
+
+    if expr.is_Add:
+        partes = [_integrar_por_tabla(termino, variable) for termino in expr.args]
+        return None if any(p is None for p in partes) else sp.Add(*partes)
+
+    coeficiente, resto = expr.as_independent(variable, as_Add=False)
+    if coeficiente != 1:
+        primitiva = _integrar_por_tabla(resto, variable)
+        return coeficiente * primitiva if primitiva is not None else None
+
+    # Potencia de un binomio lineal: (a·v + b)^n
+    base, n = resto.as_base_exp()
+    if not n.has(variable) and _es_lineal(base, variable):
+        a = sp.diff(base, variable)
+        return sp.log(base) / a if n == -1 else base**(n + 1) / (a * (n + 1))
+
+    # Funciones elementales de argumento lineal
+    if isinstance(resto, (sp.sin, sp.cos, sp.tan, sp.exp)) and _es_lineal(resto.args[0], variable):
+        u = resto.args[0]
+        a = sp.diff(u, variable)
+        if isinstance(resto, sp.sin):
+            return -sp.cos(u) / a
+        if isinstance(resto, sp.cos):
+            return sp.sin(u) / a
+        if isinstance(resto, sp.tan):
+            return -sp.log(sp.cos(u)) / a
+        return sp.exp(u) / a
+
+    if resto.is_rational_function(variable) is True:
+        numerador, denominador = sp.fraction(sp.cancel(resto))
+        if not denominador.has(variable):
+            return sp.Poly(resto, variable).integrate().as_expr()
+        # Derivada logarítmica: k·g'/g
+        k = sp.cancel(numerador / sp.diff(denominador, variable))
+        if not k.has(variable):
+            return k * sp.log(denominador)
+        # Fracciones parciales: cada término vuelve a la tabla
+        descompuesta = sp.apart(resto, variable)
+        if descompuesta != resto:
+            return _integrar_por_tabla(descompuesta, variable)
+
+    return None
@@ -1,16 +1,22 @@
+import queue
 import tkinter as tk
 from tkinter import ttk, messagebox
-from ecuacion_exacta import analizar_ecuacion_exacta, obtener_edo_explicita
-import sympy as sp
+from concurrent.futures import ThreadPoolExecutor
+from ecuacion_exacta import SesionAnalisis
+from muestreo_adaptativo import PIXELES_POR_DEFECTO
 import numpy as np
-from scipy.integrate import solve_ivp
-import matplotlib.pyplot as plt
+import sympy as sp
+from matplotlib.figure import Figure
+from matplotlib.collections import LineCollection
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
 
 class EcuacionExactaApp:
     def __init__(self, root):
         self.root = root
         self.root.title("Analizador de Ecuaciones Diferenciales Exactas")
         self.root.geometry("800x600")
+        self.sesion = None
+        self.explorador = None
         
         # Crear y configurar el estilo
         style = ttk.Style()
@@ -81,8 +87,10 @@ class EcuacionExactaApp:
         try:
             # Permitir ^ como potencia
             ecuacion_str = ecuacion_str.replace('^', '**')
-            resultado = analizar_ecuacion_exacta(ecuacion_str)
-            self.mostrar_resultados(resultado)
+            self.sesion = SesionAnalisis(ecuacion_str)
+            self.mostrar_resultados(self.sesion.resultado)
+            if self.explorador is not None and self.sesion.N != 0:
+                self.explorador.usar_sesion(self.sesion)
         except Exception as e:
             messagebox.showerror("Error", f"Error al analizar la ecuación: {str(e)}\n\nAsegúrese de usar el formato correcto:\nM(x,y)*dx + N(x,y)*dy = 0")
     
@@ -93,7 +101,8 @@ class EcuacionExactaApp:
             return str(expr).replace('**', '^')
         
         # Mostrar si es exacta
-        self.resultados_text.insert(tk.END, f"¿Es exacta?: {'Sí' if resultado['es_exacta'] else 'No'}\n\n")
+        exacta = {True: 'Sí', False: 'No', None: 'Sin decidir (se agotó el plazo)'}[resultado['es_exacta']]
+        self.resultados_text.insert(tk.END, f"¿Es exacta?: {exacta}\n\n")
         
         # Mostrar M y N
         self.resultados_text.insert(tk.END, f"M = {formatear(resultado['M'])}\n")
@@ -103,7 +112,7 @@ class EcuacionExactaApp:
         self.resultados_text.insert(tk.END, f"∂M/∂y = {formatear(resultado['dM_dy'])}\n")
         self.resultados_text.insert(tk.END, f"∂N/∂x = {formatear(resultado['dN_dx'])}\n\n")
         
-        if not resultado['es_exacta']:
+        if resultado['es_exacta'] is False:
             self.resultados_text.insert(tk.END, "La ecuación no es exacta. Calculando factor integrante...\n\n")
             if resultado.get('factor_integrante') is not None:
                 caso = resultado.get('caso_factor')
@@ -137,41 +146,203 @@ class EcuacionExactaApp:
             self.resultados_text.insert(tk.END, f"¿La nueva ecuación es exacta?: {'Sí' if resultado['es_exacta_nueva'] else 'No'}\n")
 
     def resolver_numericamente(self):
-        # Pedir condición inicial y dominio
-        top = tk.Toplevel(self.root)
-        top.title("Resolución numérica")
-        tk.Label(top, text="Condición inicial x0:").grid(row=0, column=0)
-        x0_entry = tk.Entry(top)
-        x0_entry.grid(row=0, column=1)
-        tk.Label(top, text="Condición inicial y0:").grid(row=1, column=0)
-        y0_entry = tk.Entry(top)
-        y0_entry.grid(row=1, column=1)
-        tk.Label(top, text="x final:").grid(row=2, column=0)
-        xf_entry = tk.Entry(top)
-        xf_entry.grid(row=2, column=1)
-        def ejecutar():
+        try:
+            ecuacion_str = self.ecuacion_entry.get().replace('^', '**')
+            # Reutilizar la interpretación y el lado derecho compilado de la sesión actual
+            if self.sesion is None or self.sesion.ecuacion != ecuacion_str:
+                self.sesion = SesionAnalisis(ecuacion_str)
+            self.sesion.rhs_numerico  # falla aquí si la ecuación no tiene forma explícita
+            # Una sola ventana de exploración, reutilizada mientras esté abierta
+            if self.explorador is None:
+                self.explorador = ExploradorCurvas(self)
+            self.explorador.usar_sesion(self.sesion)
+            self.explorador.ventana.lift()
+        except Exception as e:
+            messagebox.showerror("Error", f"Error en la resolución numérica: {e}")
+
+class ExploradorCurvas:
+    """
+    Gráfica embebida para explorar curvas solución. Un clic en la gráfica (o x0, y0 y
+    "Graficar") integra hacia atrás y hacia adelante en segundo plano; solo se dibuja la
+    curva nueva, con blitting sobre el fondo guardado. Las curvas calculadas se guardan
+    por ecuación y se dibujan todas en una sola LineCollection: pan y zoom no recalculan nada.
+    """
+    INTERVALO_COLA_MS = 40
+    # |dy/dx| máxima en unidades de alto/ancho de la vista: más allá, la curva tiene una
+    # tangente vertical y el integrador avanza muy lento
+    PENDIENTE_RELATIVA = 100
+    COLOR_CURVAS = 'tab:blue'
+    
+    def __init__(self, app):
+        self.app = app
+        self.ventana = tk.Toplevel(app.root)
+        self.ventana.title("Explorador de soluciones")
+        self.ventana.protocol("WM_DELETE_WINDOW", self.cerrar)
+        
+        # Controles: condición inicial escrita a mano, limpiar y estado
+        controles = ttk.Frame(self.ventana, padding="5")
+        controles.pack(side=tk.TOP, fill=tk.X)
+        ttk.Label(controles, text="x0:").pack(side=tk.LEFT)
+        self.x0_entry = ttk.Entry(controles, width=8)
+        self.x0_entry.pack(side=tk.LEFT)
+        ttk.Label(controles, text="y0:").pack(side=tk.LEFT)
+        self.y0_entry = ttk.Entry(controles, width=8)
+        self.y0_entry.pack(side=tk.LEFT)
+        ttk.Button(controles, text="Graficar", command=self.graficar_desde_entradas).pack(side=tk.LEFT, padx=5)
+        ttk.Button(controles, text="Limpiar", command=self.limpiar).pack(side=tk.LEFT)
+        self.estado = ttk.Label(controles, text="Haga clic en la gráfica para trazar la solución por ese punto")
+        self.estado.pack(side=tk.LEFT, padx=10)
+        
+        # Figura embebida (sin pyplot): límites fijos para que el blitting sea válido
+        self.figura = Figure(figsize=(6, 5))
+        self.ax = self.figura.add_subplot(111)
+        self.ax.set_xlim(-5, 5)
+        self.ax.set_ylim(-5, 5)
+        self.ax.set_autoscale_on(False)
+        self.ax.set_xlabel('x')
+        self.ax.set_ylabel('y')
+        self.ax.grid(True)
+        self.coleccion = LineCollection([], colors=self.COLOR_CURVAS, linewidths=1)
+        self.ax.add_collection(self.coleccion)
+        # Artista reutilizado para la curva recién calculada: animado, no entra en los dibujos completos
+        self.linea_nueva, = self.ax.plot([], [], color=self.COLOR_CURVAS, linewidth=1, animated=True)
+        
+        self.canvas = FigureCanvasTkAgg(self.figura, master=self.ventana)
+        self.barra = NavigationToolbar2Tk(self.canvas, self.ventana, pack_toolbar=False)
+        self.barra.update()
+        self.barra.pack(side=tk.BOTTOM, fill=tk.X)
+        self.canvas.get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH, expand=True)
+        self.fondo = None
+        self.canvas.mpl_connect('draw_event', self._al_dibujar)
+        self.canvas.mpl_connect('button_press_event', self._al_hacer_clic)
+        
+        # Cálculo en segundo plano; los resultados vuelven al hilo de Tk por una cola
+        self.ejecutor = ThreadPoolExecutor(max_workers=2)
+        self.resultados = queue.Queue()
+        self.pendientes = {}            # (ecuación, (x0, y0)) -> futuro del cálculo
+        self.curvas_por_ecuacion = {}   # ecuación -> {(x0, y0): arreglo de puntos (n, 2)}
+        self.curvas = {}
+        self.sesion = None
+        self.mensaje = ''
+        self._id_revision = self.ventana.after(self.INTERVALO_COLA_MS, self._revisar_cola)
+    
+    def usar_sesion(self, sesion):
+        """
+        Cambia la ecuación explorada; las curvas de cada ecuación quedan guardadas
+        """
+        if sesion is self.sesion:
+            return
+        sesion.rhs_numerico  # se compila en este hilo: los hilos de trabajo solo lo evalúan
+        self.sesion = sesion
+        self.curvas = self.curvas_por_ecuacion.setdefault(sesion.ecuacion, {})
+        self.ax.set_title(sesion.edo_explicita.replace('**', '^'), fontsize=9)
+        self.coleccion.set_segments(self._segmentos())
+        self.canvas.draw_idle()
+        self._mostrar_estado()
+    
+    def graficar_desde_entradas(self):
+        try:
+            x0 = float(self.x0_entry.get())
+            y0 = float(self.y0_entry.get())
+        except ValueError:
+            messagebox.showerror("Error", "x0 e y0 deben ser números", parent=self.ventana)
+            return
+        self.trazar(x0, y0)
+    
+    def trazar(self, x0, y0):
+        """
+        Encola el cálculo de la curva por (x0, y0) sobre la vista actual (más un margen)
+        """
+        clave = (round(x0, 9), round(y0, 9))
+        ecuacion = self.sesion.ecuacion
+        if clave in self.curvas or (ecuacion, clave) in self.pendientes:
+            return
+        # Desde un punto singular solve_ivp no avanza: no se ocupa un hilo con él
+        if self.sesion.punto_singular(x0, y0):
+            self.mensaje = f"({x0:.3g}, {y0:.3g}) es un punto singular: dy/dx no está definida"
+            self._mostrar_estado()
+            return
+        x_min, x_max = self.ax.get_xlim()
+        y_min, y_max = self.ax.get_ylim()
+        ancho, alto = x_max - x_min, y_max - y_min
+        pendiente_maxima = self.PENDIENTE_RELATIVA * alto / ancho
+        futuro = self.ejecutor.submit(self.sesion.curva_por_punto, x0, y0, x_min - ancho/2, x_max + ancho/2,
+                                      PIXELES_POR_DEFECTO, (y_min - alto, y_max + alto), pendiente_maxima)
+        self.pendientes[(ecuacion, clave)] = futuro
+        futuro.add_done_callback(lambda f: self.resultados.put((ecuacion, clave, f)))
+        self._mostrar_estado()
+    
+    def limpiar(self):
+        self.curvas.clear()
+        self.coleccion.set_segments([])
+        self.canvas.draw_idle()
+        self._mostrar_estado()
+    
+    def cerrar(self):
+        self.ventana.after_cancel(self._id_revision)
+        # shutdown(cancel_futures=True) requiere Python 3.9: los que no empezaron se cancelan aquí
+        for futuro in self.pendientes.values():
+            futuro.cancel()
+        self.ejecutor.shutdown(wait=False)
+        self.ventana.destroy()
+        self.app.explorador = None
+    
+    def _segmentos(self):
+        return [puntos for puntos in self.curvas.values() if len(puntos) > 1]
+    
+    def _revisar_cola(self):
+        # Los hilos de trabajo no tocan Tk ni matplotlib: sus resultados se dibujan desde aquí
+        while True:
             try:
-                x0 = float(x0_entry.get())
-                y0 = float(y0_entry.get())
-                xf = float(xf_entry.get())
-                ecuacion_str = self.ecuacion_entry.get().replace('^', '**')
-                edo_str = obtener_edo_explicita(ecuacion_str)
-                # Crear función f(x, y) usando eval de forma segura
-                def f(x, y):
-                    return eval(edo_str, {"x": x, "y": y, "sin": np.sin, "cos": np.cos, "exp": np.exp, "log": np.log, "sqrt": np.sqrt})
-                x_span = (x0, xf)
-                x_eval = np.linspace(x0, xf, 200)
-                sol = solve_ivp(f, x_span, [y0], t_eval=x_eval, method='RK45')
-                plt.plot(sol.t, sol.y[0], label='Solución numérica')
-                plt.xlabel('x')
-                plt.ylabel('y')
-                plt.title('Solución numérica de la EDO')
-                plt.legend()
-                plt.grid()
-                plt.show()
+                ecuacion, clave, futuro = self.resultados.get_nowait()
+            except queue.Empty:
+                break
+            self.pendientes.pop((ecuacion, clave), None)
+            if futuro.cancelled():
+                continue
+            try:
+                x, y, mensajes = futuro.result()
             except Exception as e:
-                messagebox.showerror("Error", f"Error en la resolución numérica: {e}")
-        tk.Button(top, text="Graficar", command=ejecutar).grid(row=3, column=0, columnspan=2, pady=10)
+                self.mensaje = f"Error: {e}"
+                continue
+            self.mensaje = mensajes[0] if mensajes else ''
+            puntos = np.column_stack((x, y))
+            self.curvas_por_ecuacion.setdefault(ecuacion, {})[clave] = puntos
+            if ecuacion == self.sesion.ecuacion and len(puntos) > 1:
+                self._dibujar_curva_nueva(puntos)
+        self._mostrar_estado()
+        self._id_revision = self.ventana.after(self.INTERVALO_COLA_MS, self._revisar_cola)
+    
+    def _dibujar_curva_nueva(self, puntos):
+        # La colección se actualiza para el próximo dibujo completo; ahora solo se dibuja la curva nueva
+        self.coleccion.set_segments(self._segmentos())
+        if self.fondo is None:
+            self.canvas.draw_idle()
+            return
+        self.canvas.restore_region(self.fondo)
+        self.linea_nueva.set_data(puntos[:, 0], puntos[:, 1])
+        self.ax.draw_artist(self.linea_nueva)
+        self.canvas.blit(self.ax.bbox)
+        self.fondo = self.canvas.copy_from_bbox(self.ax.bbox)
+    
+    def _al_dibujar(self, evento):
+        # Tras cada dibujo completo (pan, zoom, cambio de tamaño) se guarda el fondo para el blitting
+        self.fondo = self.canvas.copy_from_bbox(self.ax.bbox)
+    
+    def _al_hacer_clic(self, evento):
+        # Con pan o zoom activos el clic es de la barra de herramientas
+        if evento.inaxes is not self.ax or evento.button != 1 or self.barra.mode:
+            return
+        self.trazar(evento.xdata, evento.ydata)
+    
+    def _mostrar_estado(self):
+        texto = f"{len(self.curvas)} curvas"
+        en_curso = sum(1 for ecuacion, _ in self.pendientes if ecuacion == self.sesion.ecuacion) if self.sesion else 0
+        if en_curso:
+            texto += f", calculando {en_curso}"
+        if self.mensaje:
+            texto += f" — {self.mensaje}"
+        self.estado.config(text=texto)
 
 def main():
     root = tk.Tk()
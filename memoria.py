@@ -0,0 +1,135 @@
+"""
+Control de memoria para procesos que analizan muchas ecuaciones.
+
+La caché global de sympy (y la de integrales) conserva expresiones construidas
+durante la búsqueda de factores. ControlMemoria la vacía cada N ecuaciones,
+cuando supera un número de entradas o cuando el RSS del proceso pasa un umbral,
+y devuelve métricas (RSS antes y después, tamaños de caché) para los registros
+del procesamiento por lotes y del servicio.
+"""
+
+import gc
+import os
+import sys
+
+from sympy.core.cache import CACHE, clear_cache
+
+from integracion import limpiar_cache_integrales, estadisticas_integracion
+from solucion_explicita import limpiar_cache_despejes
+
+def rss_mb():
+    """
+    Memoria residente actual del proceso en MB, o None si no se puede medir en esta
+    plataforma (se lee de /proc; ver rss_pico_mb para las demás)
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            paginas = int(f.read().split()[1])
+        return paginas * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except (OSError, ValueError, AttributeError):
+        return None
+
+def rss_pico_mb():
+    """
+    Pico de memoria residente del proceso en MB (ru_maxrss), o None si no está disponible.
+    Nunca baja: vaciar las cachés no lo reduce.
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss está en bytes en macOS y en KB en Linux y los BSD
+    return pico / 2**20 if sys.platform == 'darwin' else pico / 2**10
+
+def tamano_cache_sympy():
+    """
+    Entradas guardadas en todas las funciones con caché de sympy
+    """
+    return sum(funcion.cache_info().currsize for funcion in CACHE if hasattr(funcion, 'cache_info'))
+
+def metricas_memoria():
+    rss = rss_mb()
+    pico = rss_pico_mb()
+    return {
+        'rss_mb': round(rss, 1) if rss is not None else None,
+        'rss_pico_mb': round(pico, 1) if pico is not None else None,
+        'cache_sympy': tamano_cache_sympy(),
+        'cache_integrales': estadisticas_integracion()['en_cache'],
+    }
+
+def limpiar_caches():
+    clear_cache()
+    limpiar_cache_integrales()
+    limpiar_cache_despejes()
+    gc.collect()
+
+class ControlMemoria:
+    """
+    Decide después de cada análisis si hay que vaciar las cachés.
+    limpiar_cada: vaciar cada N ecuaciones
+    rss_maximo_mb: vaciar si el RSS actual del proceso supera este valor. Solo se aplica donde
+        rss_mb() puede medirlo: el pico (rss_pico_mb) no baja al vaciar, y con él se vaciaría
+        en cada ecuación una vez superado el límite.
+    cache_maximo: vaciar si la caché de sympy supera este número de entradas
+    Sin ningún límite solo mide.
+    """
+    __slots__ = ('limpiar_cada', 'rss_maximo_mb', 'cache_maximo', 'analizadas', 'limpiezas')
+
+    def __init__(self, limpiar_cada=None, rss_maximo_mb=None, cache_maximo=None):
+        self.limpiar_cada = limpiar_cada
+        self.rss_maximo_mb = rss_maximo_mb
+        self.cache_maximo = cache_maximo
+        self.analizadas = 0
+        self.limpiezas = 0
+
+    def despues_de_analizar(self):
+        """
+        Registra un análisis terminado, vacía las cachés si corresponde y devuelve
+        las métricas: rss_antes_mb, rss_despues_mb, cache_sympy, cache_integrales, limpieza.
+        """
+        self.analizadas += 1
+        antes = metricas_memoria()
+        motivo = self._motivo_limpieza(antes)
+        despues = antes
+        if motivo is not None:
+            limpiar_caches()
+            self.limpiezas += 1
+            despues = metricas_memoria()
+        return {
+            'rss_antes_mb': antes['rss_mb'],
+            'rss_despues_mb': despues['rss_mb'],
+            'cache_sympy': antes['cache_sympy'],
+            'cache_integrales': antes['cache_integrales'],
+            'limpieza': motivo,
+        }
+
+    def _motivo_limpieza(self, metricas):
+        if self.limpiar_cada and self.analizadas % self.limpiar_cada == 0:
+            return f'cada {self.limpiar_cada} ecuaciones'
+        if self.cache_maximo is not None and metricas['cache_sympy'] > self.cache_maximo:
+            return f"caché sympy {metricas['cache_sympy']} > {self.cache_maximo}"
+        if (self.rss_maximo_mb is not None and metricas['rss_mb'] is not None
+                and metricas['rss_mb'] > self.rss_maximo_mb):
+            return f"RSS {metricas['rss_mb']} MB > {self.rss_maximo_mb} MB"
+        return None
+
+# Control del proceso actual (cada proceso de trabajo de un pool tiene el suyo)
+_control_proceso = None
+
+def configurar_proceso(opciones=None):
+    """
+    Activa el control de memoria del proceso con las opciones de ControlMemoria
+    (sirve como initializer de un pool). opciones=None lo desactiva.
+    """
+    global _control_proceso
+    _control_proceso = ControlMemoria(**opciones) if opciones is not None else None
+
+def registrar_analisis():
+    """
+    Avisa al control del proceso que terminó un análisis. Devuelve sus métricas,
+    o None si el control no está activo.
+    """
+    if _control_proceso is None:
+        return None
+    return _control_proceso.despues_de_analizar()
@@ -0,0 +1,108 @@
+"""
+Muestreo adaptativo de soluciones numéricas y reducción para graficar.
+
+En lugar de evaluar solve_ivp en un np.linspace fijo, la solución se integra con
+salida densa (dense_output=True) y:
+
+- muestrear_adaptativo parte de los pasos del integrador y subdivide solo los
+  tramos donde la curva se aparta de la cuerda más que la tolerancia (tramos con
+  curvatura) y más que el error del propio integrador,
+- reducir_lttb (Largest-Triangle-Three-Buckets) elige a lo sumo `pixeles` puntos
+  conservando picos y quiebres, para que graficar y guardar la solución cueste
+  lo mismo sin importar lo largo del intervalo.
+"""
+
+import numpy as np
+
+# Desvío máximo respecto de la cuerda, como fracción del rango de y de la solución
+TOLERANCIA_MUESTREO = 1e-3
+
+# Subdivisiones sucesivas de un mismo paso del integrador y tope de puntos generados
+PROFUNDIDAD_MAXIMA = 12
+MAX_PUNTOS_MUESTREO = 20000
+
+# Puntos a graficar: del orden del ancho en píxeles de una figura
+PIXELES_POR_DEFECTO = 800
+
+def muestrear_adaptativo(sol, tolerancia=TOLERANCIA_MUESTREO, rtol=1e-3, atol=1e-6,
+                         profundidad=PROFUNDIDAD_MAXIMA, max_puntos=MAX_PUNTOS_MUESTREO):
+    """
+    Muestrea la salida densa de una solución de solve_ivp (integrada con dense_output=True)
+    subdividiendo los tramos cuyo punto medio se aparta de la cuerda más que
+    max(tolerancia·rango_y, rtol·|y| + atol). rtol y atol deben ser los del integrador:
+    refinar por debajo de su error no agrega información.
+    Devuelve (x, y) como arreglos de numpy.
+    """
+    if sol.sol is None:
+        raise ValueError("La solución no tiene salida densa (usar solve_ivp con dense_output=True)")
+    x = np.asarray(sol.t, dtype=float)
+    y = np.asarray(sol.y[0], dtype=float)
+    if len(x) < 2:
+        return x, y
+    rango = np.ptp(y[np.isfinite(y)]) if np.isfinite(y).any() else 0.0
+    umbral_curva = tolerancia * (rango if rango > 0 else 1.0)
+
+    # Cada nivel evalúa todos los puntos medios pendientes en una sola llamada a la salida densa
+    pendientes = np.arange(len(x) - 1)
+    for _ in range(profundidad):
+        if len(pendientes) == 0 or len(x) >= max_puntos:
+            break
+        pendientes = pendientes[:max_puntos - len(x)]
+        izq, der = x[pendientes], x[pendientes + 1]
+        medios = (izq + der) / 2
+        y_medios = sol.sol(medios)[0]
+        cuerda = (y[pendientes] + y[pendientes + 1]) / 2
+        desvio = np.abs(y_medios - cuerda)
+        umbral = np.maximum(umbral_curva, rtol * np.abs(y_medios) + atol)
+        refinar = ~(desvio <= umbral)  # NaN también se refina: el tramo cruza una singularidad
+        refinar &= np.abs(der - izq) > 4 * np.finfo(float).eps * np.maximum(np.abs(izq), 1.0)
+        if not refinar.any():
+            break
+
+        # Insertar los puntos medios de los tramos a refinar, manteniendo x ordenado
+        nuevos = pendientes[refinar]
+        posiciones = nuevos + 1
+        x = np.insert(x, posiciones, medios[refinar])
+        y = np.insert(y, posiciones, y_medios[refinar])
+        # Tras insertar, el tramo k original es el índice k + (insertados antes de k);
+        # sus dos mitades son los tramos de ese índice y el siguiente
+        inicio = nuevos + np.arange(len(nuevos))
+        pendientes = np.column_stack((inicio, inicio + 1)).ravel()
+    return x, y
+
+def reducir_lttb(x, y, pixeles=PIXELES_POR_DEFECTO):
+    """
+    Reduce (x, y) a lo sumo `pixeles` puntos con Largest-Triangle-Three-Buckets:
+    conserva el primero y el último y, en cada balde, el punto que forma el triángulo
+    de mayor área con el elegido anterior y el promedio del balde siguiente.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if pixeles >= n or pixeles < 3:
+        return x, y
+
+    bordes = np.linspace(1, n - 1, pixeles - 1).astype(int)
+    elegidos = np.empty(pixeles, dtype=int)
+    elegidos[0], elegidos[-1] = 0, n - 1
+    anterior = 0
+    for i in range(pixeles - 2):
+        inicio, fin = bordes[i], bordes[i + 1]
+        if i + 2 < len(bordes):
+            siguiente = slice(bordes[i + 1], bordes[i + 2])
+            x_sig, y_sig = x[siguiente].mean(), y[siguiente].mean()
+        else:
+            x_sig, y_sig = x[-1], y[-1]
+        xa, ya = x[anterior], y[anterior]
+        areas = np.abs((xa - x_sig) * (y[inicio:fin] - ya) - (xa - x[inicio:fin]) * (y_sig - ya))
+        areas = np.where(np.isfinite(areas), areas, -1.0)
+        anterior = inicio + int(np.argmax(areas))
+        elegidos[i + 1] = anterior
+    return x[elegidos], y[elegidos]
+
+def muestrear_para_graficar(sol, pixeles=PIXELES_POR_DEFECTO, **opciones):
+    """
+    Muestreo adaptativo de la salida densa seguido de LTTB a `pixeles` puntos
+    """
+    x, y = muestrear_adaptativo(sol, **opciones)
+    return reducir_lttb(x, y, pixeles)
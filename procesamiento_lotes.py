@@ -0,0 +1,259 @@
+"""
+Procesamiento por lotes de ecuaciones en flujo continuo (JSONL).
+
+Lee ecuaciones línea por línea de un archivo o de stdin, las analiza con
+analizar_ecuacion_exacta con un número acotado de trabajos en curso y escribe
+un resultado JSON por línea a medida que cada uno termina.
+
+Cada línea de entrada puede ser la ecuación en texto o un objeto JSON
+{"id": ..., "ecuacion": ...}. Un archivo de checkpoint permite reanudar una
+ejecución interrumpida sin repetir los elementos ya completados. Las opciones de
+memoria vacían las cachés de sympy en cada proceso de trabajo para que su memoria
+no crezca con la cantidad de ecuaciones.
+
+Uso:
+    python procesamiento_lotes.py ecuaciones.txt -o resultados.jsonl --checkpoint estado.json
+    cat ecuaciones.txt | python procesamiento_lotes.py - --procesos 4
+    python procesamiento_lotes.py grande.txt -o res.jsonl --limpiar-cada 500 --rss-maximo 1024
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+import sympy as sp
+
+from ecuacion_exacta import analizar_ecuacion_exacta
+from biblioteca_factores import obtener_biblioteca
+from memoria import configurar_proceso, registrar_analisis
+
+# Campos que se escriben por defecto (no obligan a calcular los campos derivados)
+CAMPOS_LOTE = ('es_exacta', 'M', 'N', 'factor_integrante', 'caso_factor', 'es_exacta_nueva',
+               'via_rapida', 'nivel_exactitud', 'nivel_verificacion')
+
+VERSION_CHECKPOINT = 1
+
+def resultado_a_json(resultado, campos=CAMPOS_LOTE):
+    """
+    Convierte un resultado de análisis a un diccionario serializable en JSON.
+    Las expresiones sympy se escriben como texto. campos=None incluye todas las claves.
+    """
+    claves = resultado.keys() if campos is None else [c for c in campos if c in resultado]
+    return {clave: _a_json(resultado[clave]) for clave in claves}
+
+def _a_json(valor):
+    if isinstance(valor, sp.Basic):
+        return str(valor)
+    if isinstance(valor, dict):
+        return {str(k): _a_json(v) for k, v in valor.items()}
+    if isinstance(valor, (list, tuple)):
+        return [_a_json(v) for v in valor]
+    if isinstance(valor, (set, frozenset)):
+        return sorted(_a_json(v) for v in valor)
+    return valor
+
+def _leer_elemento(indice, linea):
+    # Devuelve (id, ecuacion) o None si la línea está vacía
+    linea = linea.strip()
+    if not linea:
+        return None
+    if linea.startswith('{'):
+        try:
+            datos = json.loads(linea)
+            return datos.get('id', indice), datos.get('ecuacion', '')
+        except ValueError:
+            pass
+    return indice, linea
+
+def _analizar_elemento(indice, identificador, ecuacion, campos):
+    inicio = time.perf_counter()
+    registro = {'id': identificador, 'ecuacion': ecuacion}
+    try:
+        # El analizador imprime su traza de búsqueda; no debe mezclarse con la salida JSONL
+        with open(os.devnull, 'w') as nulo, contextlib.redirect_stdout(nulo):
+            resultado = analizar_ecuacion_exacta(ecuacion)
+            registro['resultado'] = resultado_a_json(resultado, campos)
+    except Exception as e:
+        registro['error'] = str(e)
+    registro['segundos'] = round(time.perf_counter() - inicio, 4)
+    metricas = registrar_analisis()
+    if metricas is not None:
+        registro['memoria'] = metricas
+    return indice, registro
+
+class Checkpoint:
+    """
+    Estado de avance de tamaño acotado: una marca (todas las líneas anteriores están
+    completas) y el conjunto de líneas completadas por encima de ella, que nunca
+    supera la ventana de reordenamiento.
+    """
+    __slots__ = ('ruta', 'marca', 'completados')
+
+    def __init__(self, ruta=None):
+        self.ruta = ruta
+        self.marca = 0
+        self.completados = set()
+        if ruta and os.path.exists(ruta):
+            with open(ruta, encoding='utf-8') as f:
+                datos = json.load(f)
+            if datos.get('version') != VERSION_CHECKPOINT:
+                raise ValueError(f"Checkpoint con versión incompatible: {datos.get('version')}")
+            self.marca = datos['marca']
+            self.completados = set(datos['completados'])
+
+    def ya_completado(self, indice):
+        return indice < self.marca or indice in self.completados
+
+    def completar(self, indice):
+        if indice < self.marca:
+            return
+        self.completados.add(indice)
+        while self.marca in self.completados:
+            self.completados.remove(self.marca)
+            self.marca += 1
+
+    def guardar(self):
+        if not self.ruta:
+            return
+        temporal = self.ruta + '.tmp'
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump({'version': VERSION_CHECKPOINT, 'marca': self.marca,
+                       'completados': sorted(self.completados)}, f)
+        os.replace(temporal, self.ruta)
+
+def procesar_lote(entrada, salida, checkpoint=None, procesos=None, en_vuelo=8, campos=CAMPOS_LOTE,
+                  memoria=None):
+    """
+    Analiza las ecuaciones de `entrada` (iterable de líneas) y escribe en `salida`
+    un JSON por línea a medida que terminan. La memoria usada no depende del tamaño
+    de la entrada: a lo sumo `en_vuelo` análisis en curso y una ventana acotada
+    de resultados fuera de orden en el checkpoint.
+    procesos=0 analiza en el mismo proceso (sin pool).
+    memoria: opciones de memoria.ControlMemoria para cada proceso de trabajo
+    (limpiar_cada, rss_maximo_mb, cache_maximo); {} solo mide. Con memoria, cada
+    registro lleva sus métricas y el resumen el RSS máximo y las limpiezas.
+    Devuelve un resumen con los conteos.
+    """
+    estado = checkpoint if isinstance(checkpoint, Checkpoint) else Checkpoint(checkpoint)
+    ventana = 4 * en_vuelo
+    resumen = {'procesados': 0, 'errores': 0, 'omitidos': 0}
+    if memoria is not None:
+        resumen.update(rss_maximo_mb=None, limpiezas=0)
+
+    def registrar(indice, registro):
+        salida.write(json.dumps(registro, ensure_ascii=False) + '\n')
+        salida.flush()
+        # El checkpoint se actualiza después de escribir: nunca marca algo que no está en la salida
+        estado.completar(indice)
+        estado.guardar()
+        resumen['procesados'] += 1
+        if 'error' in registro:
+            resumen['errores'] += 1
+        if 'memoria' in registro:
+            _acumular_memoria(resumen, registro['memoria'])
+
+    elementos = _elementos_pendientes(entrada, estado, resumen)
+
+    if procesos == 0:
+        configurar_proceso(memoria)
+        try:
+            for indice, identificador, ecuacion in elementos:
+                registrar(*_analizar_elemento(indice, identificador, ecuacion, campos))
+        finally:
+            configurar_proceso(None)
+            estado.guardar()
+        return resumen
+
+    # Cargada antes de crear el pool, los procesos hijos heredan la biblioteca de candidatos
+    obtener_biblioteca()
+    with ProcessPoolExecutor(max_workers=procesos, initializer=configurar_proceso, initargs=(memoria,)) as pool:
+        pendientes = set()
+        try:
+            for indice, identificador, ecuacion in elementos:
+                # Contrapresión: limitar trabajos en curso y distancia a la marca del checkpoint
+                while pendientes and (len(pendientes) >= en_vuelo or indice - estado.marca >= ventana):
+                    terminados, pendientes = wait(pendientes, return_when=FIRST_COMPLETED)
+                    for futuro in terminados:
+                        registrar(*futuro.result())
+                pendientes.add(pool.submit(_analizar_elemento, indice, identificador, ecuacion, campos))
+
+            for futuro in _a_medida_que_terminan(pendientes):
+                registrar(*futuro.result())
+        except BaseException:
+            for futuro in pendientes:
+                futuro.cancel()
+            raise
+        finally:
+            estado.guardar()
+    return resumen
+
+def _acumular_memoria(resumen, metricas):
+    rss = metricas['rss_antes_mb']
+    if rss is not None and (resumen['rss_maximo_mb'] is None or rss > resumen['rss_maximo_mb']):
+        resumen['rss_maximo_mb'] = rss
+    if metricas['limpieza'] is not None:
+        resumen['limpiezas'] += 1
+
+def _elementos_pendientes(entrada, estado, resumen):
+    # Recorre la entrada de forma perezosa saltando líneas vacías y elementos ya completados
+    for indice, linea in enumerate(entrada):
+        elemento = _leer_elemento(indice, linea)
+        if elemento is None:
+            estado.completar(indice)
+        elif estado.ya_completado(indice):
+            resumen['omitidos'] += 1
+        else:
+            yield (indice,) + elemento
+
+def _a_medida_que_terminan(pendientes):
+    while pendientes:
+        terminados, pendientes = wait(pendientes, return_when=FIRST_COMPLETED)
+        yield from terminados
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Análisis por lotes de ecuaciones diferenciales (JSONL)")
+    parser.add_argument('entrada', nargs='?', default='-', help="archivo de ecuaciones, una por línea ('-' para stdin)")
+    parser.add_argument('-o', '--salida', default='-', help="archivo JSONL de resultados ('-' para stdout)")
+    parser.add_argument('--checkpoint', help="archivo de checkpoint para reanudar una ejecución interrumpida")
+    parser.add_argument('--procesos', type=int, default=None, help="procesos de trabajo (0 = sin pool)")
+    parser.add_argument('--en-vuelo', type=int, default=8, help="máximo de ecuaciones en análisis simultáneo")
+    parser.add_argument('--completo', action='store_true', help="incluir todos los campos, también los derivados")
+    parser.add_argument('--limpiar-cada', type=int, help="vaciar las cachés de sympy cada N ecuaciones (por proceso)")
+    parser.add_argument('--rss-maximo', type=float, help="vaciar las cachés si el RSS de un proceso supera estos MB")
+    parser.add_argument('--cache-maximo', type=int, help="vaciar las cachés si la de sympy supera estas entradas")
+    parser.add_argument('--metricas-memoria', action='store_true', help="agregar métricas de memoria a cada registro")
+    args = parser.parse_args(argv)
+
+    memoria = None
+    if args.metricas_memoria or args.limpiar_cada or args.rss_maximo or args.cache_maximo:
+        memoria = {'limpiar_cada': args.limpiar_cada, 'rss_maximo_mb': args.rss_maximo,
+                   'cache_maximo': args.cache_maximo}
+
+    entrada = sys.stdin if args.entrada == '-' else open(args.entrada, encoding='utf-8')
+    # Al reanudar se agrega al final de la salida existente
+    salida = sys.stdout if args.salida == '-' else open(args.salida, 'a', encoding='utf-8')
+    try:
+        resumen = procesar_lote(entrada, salida, checkpoint=args.checkpoint, procesos=args.procesos,
+                                en_vuelo=args.en_vuelo, campos=None if args.completo else CAMPOS_LOTE,
+                                memoria=memoria)
+    except KeyboardInterrupt:
+        print("Interrumpido; use el mismo --checkpoint para reanudar.", file=sys.stderr)
+        return 130
+    finally:
+        if entrada is not sys.stdin:
+            entrada.close()
+        if salida is not sys.stdout:
+            salida.close()
+    print(f"Procesados: {resumen['procesados']}, errores: {resumen['errores']}, "
+          f"omitidos (ya completados): {resumen['omitidos']}", file=sys.stderr)
+    if memoria is not None:
+        print(f"RSS máximo de un proceso: {resumen['rss_maximo_mb']} MB, "
+              f"limpiezas de caché: {resumen['limpiezas']}", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,15 +6,19 @@ Resolución numérica de la ecuación diferencial:
     (cos(x)+sin(y)+cos(y)) dy/dx = -(cos(x)-sin(x)+sin(y))
     dy/dx = - (cos(x)-sin(x)+sin(y)) / (cos(x)+sin(y)+cos(y))
 
-2. Resolución numérica usando scipy.integrate.solve_ivp
+2. Resolución numérica usando scipy.integrate.solve_ivp (salida densa)
 
-3. Gráfica de la solución
+3. Muestreo adaptativo de la solución y reducción (LTTB) al ancho de la gráfica
+
+4. Gráfica de la solución
 """
 
 import numpy as np
 from scipy.integrate import solve_ivp
 import matplotlib.pyplot as plt
 
+from muestreo_adaptativo import muestrear_para_graficar
+
 # Definir la función f(x, y)
 def f(x, y):
     return - (np.cos(x) - np.sin(x) + np.sin(y)) / (np.cos(x) + np.sin(y) + np.cos(y))
@@ -25,13 +29,17 @@ y0 = 0
 
 # Intervalo de integración (ajusta según el dominio de interés)
 x_span = (x0, 2*np.pi)
-x_eval = np.linspace(x0, 2*np.pi, 200)
+
+# Puntos a graficar (aprox. el ancho de la figura en píxeles)
+pixeles = 800
 
 # Resolver la EDO
 try:
-    sol = solve_ivp(f, x_span, [y0], t_eval=x_eval, method='RK45')
+    sol = solve_ivp(f, x_span, [y0], method='RK45', dense_output=True)
+    # Más puntos donde la curva se dobla, y nunca más de `pixeles` para graficar
+    x_graf, y_graf = muestrear_para_graficar(sol, pixeles=pixeles)
     # Graficar la solución
-    plt.plot(sol.t, sol.y[0], label='Solución numérica')
+    plt.plot(x_graf, y_graf, label='Solución numérica')
     plt.xlabel('x')
     plt.ylabel('y')
     plt.title('Solución numérica de la EDO trigonométrica')
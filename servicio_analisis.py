@@ -0,0 +1,270 @@
+"""
+Servicio local de análisis (HTTP sobre asyncio).
+
+Expone analizar_ecuacion_exacta y la resolución numérica a otras herramientas
+sin que cada cliente tenga que importar sympy. Los cálculos se despachan a un
+pool de procesos; el servicio:
+
+- acota la cantidad de cálculos en curso y responde 503 cuando está saturado,
+- combina peticiones idénticas concurrentes en un solo cálculo,
+- aplica un plazo por petición (504 si se vence).
+
+Rutas:
+    POST /analizar  {"ecuacion": "...", "plazo": 10}
+    POST /resolver  {"ecuacion": "...", "x0": 0, "y0": 0, "xf": 1, "n_puntos": 200,
+                     "adaptativo": false, "plazo": 10}
+    GET  /salud
+
+Uso:
+    python servicio_analisis.py --puerto 8765
+"""
+
+import argparse
+import asyncio
+import contextlib
+import http.client
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from biblioteca_factores import obtener_biblioteca
+from ecuacion_exacta import analizar_ecuacion_exacta, SesionAnalisis, _normalizar_ecuacion
+from memoria import configurar_proceso, registrar_analisis, metricas_memoria
+from procesamiento_lotes import resultado_a_json
+
+HOST_LOCAL = '127.0.0.1'
+PUERTO_POR_DEFECTO = 8765
+MAX_EN_CURSO = 32
+PLAZO_POR_DEFECTO = 30.0
+TAMANO_MAXIMO_CUERPO = 1 << 20
+
+class ServicioSaturado(Exception):
+    """Se alcanzó el máximo de cálculos en curso"""
+
+class ErrorPeticion(Exception):
+    """Petición mal formada"""
+
+def _tarea_analizar(ecuacion):
+    try:
+        with open(os.devnull, 'w') as nulo, contextlib.redirect_stdout(nulo):
+            return resultado_a_json(analizar_ecuacion_exacta(ecuacion))
+    finally:
+        registrar_analisis()
+
+def _tarea_resolver(ecuacion, x0, y0, xf, n_puntos, adaptativo=False):
+    try:
+        sol = SesionAnalisis(ecuacion).resolver_numericamente(x0, y0, xf, n_puntos, adaptativo)
+    finally:
+        registrar_analisis()
+    return {'exito': bool(sol.success), 'mensaje': sol.message,
+            'x': sol.t.tolist(), 'y': sol.y[0].tolist()}
+
+class ServicioAnalisis:
+    """
+    Despachador asíncrono: un cálculo por clave distinta, compartido por todas
+    las peticiones idénticas que lleguen mientras está en curso.
+    """
+
+    def __init__(self, procesos=None, max_en_curso=MAX_EN_CURSO, plazo=PLAZO_POR_DEFECTO, memoria=None):
+        # memoria: opciones de memoria.ControlMemoria para cada proceso del pool
+        obtener_biblioteca()  # los procesos hijos la heredan ya cargada
+        self.pool = ProcessPoolExecutor(max_workers=procesos, initializer=configurar_proceso,
+                                        initargs=(memoria,))
+        self.max_en_curso = max_en_curso
+        self.plazo = plazo
+        self._en_curso = {}      # clave -> asyncio.Future del cálculo
+        self._esperando = {}     # clave -> peticiones que esperan ese cálculo
+        self.estadisticas = {'calculos': 0, 'combinadas': 0, 'rechazadas': 0, 'vencidas': 0}
+
+    async def analizar(self, ecuacion, plazo=None):
+        clave = ('analizar', _normalizar_ecuacion(ecuacion))
+        return await self._resolver_clave(clave, plazo, _tarea_analizar, ecuacion)
+
+    async def resolver(self, ecuacion, x0, y0, xf, n_puntos=200, plazo=None, adaptativo=False):
+        clave = ('resolver', _normalizar_ecuacion(ecuacion), x0, y0, xf, n_puntos, adaptativo)
+        return await self._resolver_clave(clave, plazo, _tarea_resolver, ecuacion, x0, y0, xf, n_puntos,
+                                          adaptativo)
+
+    async def _resolver_clave(self, clave, plazo, funcion, *args):
+        en_curso = self._en_curso.get(clave)
+        if en_curso is not None and en_curso[1].cancelled():
+            # Retirado de la cola; _terminar todavía no corrió en el loop
+            self._terminar(clave, en_curso[1])
+            en_curso = None
+        if en_curso is not None:
+            self.estadisticas['combinadas'] += 1
+        else:
+            if len(self._en_curso) >= self.max_en_curso:
+                self.estadisticas['rechazadas'] += 1
+                raise ServicioSaturado()
+            loop = asyncio.get_running_loop()
+            calculo = self.pool.submit(funcion, *args)
+            en_curso = (asyncio.wrap_future(calculo), calculo)
+            self._en_curso[clave] = en_curso
+            self._esperando[clave] = 0
+            self.estadisticas['calculos'] += 1
+            # El lugar se libera cuando termina el cálculo en el pool, no cuando lo abandonan las peticiones
+            calculo.add_done_callback(lambda _: _llamar_en_loop(loop, self._terminar, clave, calculo))
+        futuro, calculo = en_curso
+
+        self._esperando[clave] += 1
+        try:
+            # shield: si vence el plazo de una petición, el cálculo sigue para las demás
+            return await asyncio.wait_for(asyncio.shield(futuro), plazo or self.plazo)
+        except asyncio.TimeoutError:
+            self.estadisticas['vencidas'] += 1
+            raise
+        finally:
+            if self._en_curso.get(clave) is en_curso:
+                self._esperando[clave] -= 1
+                # Nadie más espera: se retira de la cola del pool si todavía no empezó;
+                # si ya empezó, cancel() no tiene efecto y sigue ocupando su lugar
+                if self._esperando[clave] == 0:
+                    calculo.cancel()
+
+    def _terminar(self, clave, calculo):
+        en_curso = self._en_curso.get(clave)
+        if en_curso is not None and en_curso[1] is calculo:
+            del self._en_curso[clave]
+            self._esperando.pop(clave, None)
+
+    def cerrar(self):
+        # shutdown(cancel_futures=True) requiere Python 3.9: los que no empezaron se cancelan aquí
+        for _, calculo in list(self._en_curso.values()):
+            calculo.cancel()
+        self.pool.shutdown(wait=False)
+
+    # --- Capa HTTP mínima ---
+
+    async def atender(self, lector, escritor):
+        try:
+            estado, cuerpo, extra = await self._atender_peticion(lector)
+        except Exception as e:
+            estado, cuerpo, extra = 500, {'error': str(e)}, {}
+        datos = json.dumps(cuerpo, ensure_ascii=False).encode('utf-8')
+        cabeceras = [f"HTTP/1.1 {estado} {http.client.responses.get(estado, '')}",
+                     'Content-Type: application/json; charset=utf-8',
+                     f'Content-Length: {len(datos)}',
+                     'Connection: close']
+        cabeceras += [f'{k}: {v}' for k, v in extra.items()]
+        escritor.write(('\r\n'.join(cabeceras) + '\r\n\r\n').encode('latin-1') + datos)
+        try:
+            await escritor.drain()
+        finally:
+            escritor.close()
+
+    async def _atender_peticion(self, lector):
+        try:
+            metodo, ruta, datos = await _leer_peticion(lector)
+        except ErrorPeticion as e:
+            return 400, {'error': str(e)}, {}
+
+        if metodo == 'GET' and ruta == '/salud':
+            return 200, {'estado': 'ok', 'en_curso': len(self._en_curso), **self.estadisticas,
+                         'memoria': metricas_memoria()}, {}
+        if metodo != 'POST' or ruta not in ('/analizar', '/resolver'):
+            return 404, {'error': f'Ruta no encontrada: {metodo} {ruta}'}, {}
+
+        try:
+            ecuacion = datos['ecuacion']
+            plazo = datos.get('plazo')
+            if ruta == '/analizar':
+                respuesta = await self.analizar(ecuacion, plazo)
+            else:
+                respuesta = await self.resolver(ecuacion, float(datos['x0']), float(datos['y0']),
+                                                float(datos['xf']), int(datos.get('n_puntos', 200)), plazo,
+                                                bool(datos.get('adaptativo', False)))
+        except (KeyError, TypeError, ValueError) as e:
+            return 400, {'error': f'Petición inválida: {e}'}, {}
+        except ServicioSaturado:
+            return 503, {'error': 'Servicio saturado, reintente más tarde'}, {'Retry-After': '1'}
+        except asyncio.TimeoutError:
+            return 504, {'error': 'Se venció el plazo de la petición'}, {}
+        except Exception as e:
+            return 422, {'error': str(e)}, {}
+        return 200, respuesta, {}
+
+def _llamar_en_loop(loop, funcion, *args):
+    # Los callbacks de concurrent.futures corren en otro hilo
+    try:
+        loop.call_soon_threadsafe(funcion, *args)
+    except RuntimeError:
+        pass  # el loop ya se cerró
+
+async def _leer_peticion(lector):
+    linea = (await lector.readline()).decode('latin-1').strip()
+    partes = linea.split()
+    if len(partes) != 3:
+        raise ErrorPeticion(f'Línea de petición inválida: {linea!r}')
+    metodo, ruta, _ = partes
+    longitud = 0
+    while True:
+        cabecera = (await lector.readline()).decode('latin-1').strip()
+        if not cabecera:
+            break
+        nombre, _, valor = cabecera.partition(':')
+        if nombre.strip().lower() == 'content-length':
+            longitud = int(valor.strip())
+    if longitud > TAMANO_MAXIMO_CUERPO:
+        raise ErrorPeticion('Cuerpo demasiado grande')
+    datos = {}
+    if longitud:
+        try:
+            datos = json.loads(await lector.readexactly(longitud))
+        except ValueError as e:
+            raise ErrorPeticion(f'JSON inválido: {e}')
+    return metodo, ruta, datos
+
+async def iniciar_servidor(servicio, host=HOST_LOCAL, puerto=PUERTO_POR_DEFECTO):
+    """
+    Abre el servidor HTTP local para `servicio`. Devuelve el asyncio.Server.
+    """
+    return await asyncio.start_server(servicio.atender, host, puerto)
+
+def consultar(ruta, datos=None, host=HOST_LOCAL, puerto=PUERTO_POR_DEFECTO, plazo=60):
+    """
+    Cliente local mínimo: devuelve (estado_http, respuesta_json).
+    """
+    conexion = http.client.HTTPConnection(host, puerto, timeout=plazo)
+    try:
+        if datos is None:
+            conexion.request('GET', ruta)
+        else:
+            conexion.request('POST', ruta, body=json.dumps(datos),
+                             headers={'Content-Type': 'application/json'})
+        respuesta = conexion.getresponse()
+        return respuesta.status, json.loads(respuesta.read())
+    finally:
+        conexion.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Servicio local de análisis de ecuaciones diferenciales")
+    parser.add_argument('--host', default=HOST_LOCAL)
+    parser.add_argument('--puerto', type=int, default=PUERTO_POR_DEFECTO)
+    parser.add_argument('--procesos', type=int, default=None)
+    parser.add_argument('--max-en-curso', type=int, default=MAX_EN_CURSO)
+    parser.add_argument('--plazo', type=float, default=PLAZO_POR_DEFECTO, help="plazo por defecto por petición (s)")
+    parser.add_argument('--limpiar-cada', type=int, help="vaciar las cachés de sympy de cada proceso cada N cálculos")
+    parser.add_argument('--rss-maximo', type=float, help="vaciar las cachés si el RSS de un proceso supera estos MB")
+    args = parser.parse_args(argv)
+    memoria = None
+    if args.limpiar_cada or args.rss_maximo:
+        memoria = {'limpiar_cada': args.limpiar_cada, 'rss_maximo_mb': args.rss_maximo}
+
+    async def ejecutar():
+        servicio = ServicioAnalisis(args.procesos, args.max_en_curso, args.plazo, memoria)
+        servidor = await iniciar_servidor(servicio, args.host, args.puerto)
+        print(f"Servicio de análisis escuchando en http://{args.host}:{args.puerto}")
+        try:
+            async with servidor:
+                await servidor.serve_forever()
+        finally:
+            servicio.cerrar()
+
+    try:
+        asyncio.run(ejecutar())
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+"""
+Evaluación de la solución y(x) a partir de la solución implícita F(x, y) = C.
+
+Cuando el análisis encuentra la función potencial F de la ecuación (exacta, o hecha
+exacta con el factor μ), los valores de la curva solución se obtienen sin integrar
+numéricamente la EDO:
+
+- primero se intenta despejar y de F(x, y) = C con sympy, con un plazo de tiempo y
+  una caché por potencial (también se recuerdan los despejes que fallaron),
+- si no hay despeje, y(x) se calcula para arreglos de x y de C con un Newton
+  vectorizado sobre F compilada, usando ∂F/∂y = μ·N; los puntos donde Newton no
+  converge se resuelven encerrando la raíz y bisecando.
+"""
+
+from collections import OrderedDict
+
+import numpy as np
+import sympy as sp
+
+from integracion import limite_de_tiempo, TiempoAgotado
+
+# Plazo (segundos) para que sympy despeje y de F(x, y) = C
+PLAZO_DESPEJE = 5.0
+
+TAMANO_CACHE_DESPEJES = 256
+
+# Newton: iteraciones máximas y tolerancia relativa del paso
+MAX_ITERACIONES_NEWTON = 50
+TOLERANCIA_NEWTON = 1e-12
+
+# Búsqueda de un intervalo con cambio de signo alrededor de la guía y bisección
+MAX_EXPANSIONES = 40
+ITERACIONES_BISECCION = 100
+
+# Continuación de por_punto sin despeje: cada bloque de x parte de la recta tangente
+# en el último punto resuelto
+PUNTOS_POR_BLOQUE = 256
+
+_despejes = OrderedDict()
+
+def despejar(potencial, x, y, plazo=PLAZO_DESPEJE):
+    """
+    Ramas y = g(x, C) de potencial(x, y) = C como (C, [g1, g2, ...]), con C un símbolo
+    propio; la lista es vacía si sympy no despejó y dentro del plazo.
+    El resultado queda en caché por potencial.
+    """
+    if potencial in _despejes:
+        _despejes.move_to_end(potencial)
+        return _despejes[potencial]
+
+    C = sp.Dummy('C')
+    try:
+        with limite_de_tiempo(plazo):
+            ramas = sp.solve(sp.Eq(potencial, C), y)
+    except TiempoAgotado:
+        ramas = []
+    except Exception:
+        ramas = []
+    # Las raíces implícitas (RootOf) no se pueden compilar: cuentan como despeje fallido
+    ramas = [g for g in ramas if not g.has(sp.RootOf, sp.Integral)]
+
+    _despejes[potencial] = (C, ramas)
+    if len(_despejes) > TAMANO_CACHE_DESPEJES:
+        _despejes.popitem(last=False)
+    return C, ramas
+
+def limpiar_cache_despejes():
+    _despejes.clear()
+
+class SolucionImplicita:
+    """
+    Solución F(x, y) = C de un resultado de analizar_ecuacion_exacta evaluada como y(x).
+    evaluar() usa el despeje simbólico si existe y, si no, el Newton vectorizado.
+    Los parámetros de una familia (resultado.parametros) se pasan como valores o
+    arreglos en el mismo orden.
+    """
+    __slots__ = ('potencial', 'derivada_x', 'derivada_y', 'parametros', 'C', 'ramas',
+                 '_F', '_dF_dx', '_dF_dy', '_ramas_numericas')
+
+    def __init__(self, resultado, plazo=PLAZO_DESPEJE):
+        x, y = sp.symbols('x y')
+        self.potencial = resultado.potencial
+        if self.potencial is None:
+            raise ValueError("El resultado no tiene función potencial: no hay solución implícita F(x, y) = C")
+        # ∂F/∂x = μ·M y ∂F/∂y = μ·N (M y N si la ecuación ya era exacta)
+        if resultado.es_exacta:
+            self.derivada_x, self.derivada_y = resultado.M, resultado.N
+        else:
+            self.derivada_x, self.derivada_y = resultado.M_nuevo, resultado.N_nuevo
+        self.parametros = tuple(resultado.parametros)
+        self.C, self.ramas = despejar(self.potencial, x, y, plazo)
+
+        argumentos = (x, y) + self.parametros
+        self._F = sp.lambdify(argumentos, self.potencial, 'numpy')
+        self._dF_dx = sp.lambdify(argumentos, self.derivada_x, 'numpy')
+        self._dF_dy = sp.lambdify(argumentos, self.derivada_y, 'numpy')
+        self._ramas_numericas = [sp.lambdify((x, self.C) + self.parametros, g, 'numpy') for g in self.ramas]
+
+    @property
+    def explicita(self):
+        """True si se despejó y simbólicamente"""
+        return bool(self.ramas)
+
+    def constante(self, x0, y0, *parametros):
+        """
+        C de la curva que pasa por (x0, y0)
+        """
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return self._F(np.asarray(x0, dtype=float), np.asarray(y0, dtype=float), *parametros)
+
+    def evaluar(self, x, C, *parametros, y_guia=None):
+        """
+        y(x) sobre la curva F(x, y) = C. x, C, y_guia y los parámetros se combinan por
+        broadcasting. y_guia elige la rama del despeje más cercana (sin guía, la primera
+        que da un valor real) y es el punto de partida de Newton (sin guía, 0).
+        Los puntos sin solución real quedan en NaN.
+        """
+        x, C = np.broadcast_arrays(np.asarray(x, dtype=float), np.asarray(C, dtype=float))
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            if self.ramas:
+                return self._evaluar_ramas(x, C, y_guia, parametros)
+            guia = np.zeros(x.shape) if y_guia is None else y_guia
+            return self._newton(x, C, guia, parametros)
+
+    def por_punto(self, x0, y0, x, *parametros):
+        """
+        y(x) de la solución que pasa por (x0, y0), para x unidimensional.
+        Con despeje se sigue la rama que pasa por (x0, y0); sin él, Newton avanza desde x0
+        hacia cada extremo por bloques, partiendo del último valor resuelto, para no
+        saltar a otra rama de F(x, y) = C lejos de (x0, y0).
+        """
+        x = np.asarray(x, dtype=float)
+        C = self.constante(x0, y0, *parametros)
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            if self.ramas:
+                en_x0 = self._valores_ramas(np.asarray(x0, dtype=float), C, parametros)
+                distancia = np.where(np.isfinite(en_x0), np.abs(en_x0 - y0), np.inf)
+                valores = self._valores_ramas(x, C, parametros)
+                indice = np.broadcast_to(np.argmin(distancia, axis=0), valores.shape[1:])
+                return np.take_along_axis(valores, indice[np.newaxis], axis=0)[0]
+
+            y = np.full(x.shape, np.nan)
+            for lado in (np.flatnonzero(x >= x0), np.flatnonzero(x < x0)):
+                orden = lado[np.argsort(np.abs(x[lado] - x0), kind='stable')]
+                x_previo, y_previo = float(x0), float(y0)
+                for inicio in range(0, len(orden), PUNTOS_POR_BLOQUE):
+                    bloque = orden[inicio:inicio + PUNTOS_POR_BLOQUE]
+                    # dy/dx = -(∂F/∂x)/(∂F/∂y); una pendiente no finita deja la guía constante
+                    pendiente = -(self._dF_dx(x_previo, y_previo, *parametros)
+                                  / self._dF_dy(x_previo, y_previo, *parametros))
+                    pendiente = np.where(np.isfinite(pendiente), pendiente, 0.0)
+                    guia = y_previo + pendiente * (x[bloque] - x_previo)
+                    y[bloque] = self._newton(x[bloque], C, guia, parametros)
+                    resueltos = np.flatnonzero(np.isfinite(y[bloque]))
+                    if len(resueltos) == 0:
+                        break  # la curva terminó: los puntos más lejanos quedan en NaN
+                    x_previo, y_previo = x[bloque[resueltos[-1]]], y[bloque[resueltos[-1]]]
+            return y
+
+    def _valores_ramas(self, x, C, parametros):
+        # (ramas, *forma): valor de cada rama, NaN donde no es real o no está definida
+        forma = np.broadcast(x, C, *parametros).shape
+        valores = np.array([np.broadcast_to(np.asarray(g(x, C, *parametros), dtype=complex), forma)
+                            for g in self._ramas_numericas])
+        reales = np.isfinite(valores) & (np.abs(valores.imag) <= 1e-12 * np.maximum(1.0, np.abs(valores.real)))
+        return np.where(reales, valores.real, np.nan)
+
+    def _evaluar_ramas(self, x, C, y_guia, parametros):
+        valores = self._valores_ramas(x, C, parametros)
+        reales = np.isfinite(valores)
+        if y_guia is None:
+            indice = np.argmax(reales, axis=0)
+        else:
+            distancia = np.where(reales, np.abs(valores - np.asarray(y_guia, dtype=float)), np.inf)
+            indice = np.argmin(distancia, axis=0)
+        return np.take_along_axis(valores, indice[np.newaxis], axis=0)[0]
+
+    def _residuo(self, x, y, C, parametros):
+        return self._F(x, y, *parametros) - C
+
+    def _newton(self, x, C, guia, parametros):
+        x, C, y, *parametros = np.broadcast_arrays(x, C, np.asarray(guia, dtype=float),
+                                                   *(np.asarray(p, dtype=float) for p in parametros))
+        y = y.astype(float)
+        activos = np.ones(y.shape, dtype=bool)
+        convergidos = np.zeros(y.shape, dtype=bool)
+        for _ in range(MAX_ITERACIONES_NEWTON):
+            if not activos.any():
+                break
+            p = [v[activos] for v in parametros]
+            ya = y[activos]
+            paso = self._residuo(x[activos], ya, C[activos], p) / self._dF_dy(x[activos], ya, *p)
+            nuevo = ya - paso
+            finito = np.isfinite(nuevo)
+            listo = finito & (np.abs(paso) <= TOLERANCIA_NEWTON * np.maximum(1.0, np.abs(nuevo)))
+            y[activos] = np.where(finito, nuevo, ya)
+            indices = np.flatnonzero(activos)
+            convergidos[indices[listo]] = True
+            activos[indices[listo | ~finito]] = False
+
+        # Sin convergencia (derivada nula, ciclo, desborde): encerrar la raíz cerca de la guía y bisecar
+        pendientes = ~convergidos
+        if pendientes.any():
+            y[pendientes] = self._biseccion(x[pendientes], C[pendientes],
+                                            np.broadcast_to(guia, x.shape)[pendientes],
+                                            [v[pendientes] for v in parametros])
+        return y
+
+    def _biseccion(self, x, C, guia, parametros):
+        # Se amplía [guia - ancho, guia + ancho] hasta que alguna mitad cambie de signo
+        guia = np.where(np.isfinite(guia), guia, 0.0)
+        f_guia = self._residuo(x, guia, C, parametros)
+        ancho = 0.1 * np.maximum(1.0, np.abs(guia))
+        bajo, alto = guia.copy(), guia.copy()
+        f_bajo = f_guia.copy()
+        encerrado = np.zeros(x.shape, dtype=bool)
+        for _ in range(MAX_EXPANSIONES):
+            pendientes = ~encerrado
+            if not pendientes.any():
+                break
+            f_arriba = self._residuo(x, guia + ancho, C, parametros)
+            f_abajo = self._residuo(x, guia - ancho, C, parametros)
+            arriba = pendientes & (np.sign(f_guia) * np.sign(f_arriba) <= 0)
+            abajo = pendientes & ~arriba & (np.sign(f_abajo) * np.sign(f_guia) <= 0)
+            alto = np.where(arriba, guia + ancho, np.where(abajo, guia, alto))
+            bajo = np.where(abajo, guia - ancho, bajo)
+            f_bajo = np.where(abajo, f_abajo, f_bajo)
+            encerrado |= arriba | abajo
+            ancho = np.where(encerrado, ancho, 2 * ancho)
+
+        for _ in range(ITERACIONES_BISECCION):
+            medio = (bajo + alto) / 2
+            f_medio = self._residuo(x, medio, C, parametros)
+            izquierda = np.sign(f_bajo) * np.sign(f_medio) <= 0
+            alto = np.where(izquierda, medio, alto)
+            bajo = np.where(izquierda, bajo, medio)
+            f_bajo = np.where(izquierda, f_bajo, f_medio)
+        # Un cambio de signo en un polo (F → ±∞) no es una raíz
+        y = (bajo + alto) / 2
+        residuo = np.abs(self._residuo(x, y, C, parametros))
+        valido = encerrado & (residuo <= 1e-6 * np.maximum(1.0, np.abs(C)))
+        return np.where(valido, y, np.nan)
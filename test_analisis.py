@@ -8,7 +8,8 @@ ecuaciones = [
     "(x**2+y)*dx + x*dy = 0",
     "x*dy + y*dx = 0",
     "-dy + (x-y+1)*dx = 0",
-    "x*dy-y*dx=0"
+    "x*dy-y*dx=0",
+    "(y**2+1)/(2*x+y)**3*dx + 2*x*y/(2*x+y)**3*dy = 0"
 ]
 
 for eq in ecuaciones:
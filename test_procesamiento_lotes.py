@@ -0,0 +1,83 @@
+"""
+Reanudación de un lote interrumpido: la segunda ejecución con el mismo checkpoint
+debe completar la entrada sin repetir ni perder ningún elemento.
+"""
+
+import io
+import json
+import os
+import tempfile
+
+from procesamiento_lotes import procesar_lote, Checkpoint
+
+# Ecuaciones exactas (análisis rápido) con algunas líneas vacías intercaladas
+LINEAS = [f"(2*x*y+{k})*dx + x**2*dy = 0\n" if k % 5 else "\n" for k in range(1, 21)]
+INDICES = [i for i, linea in enumerate(LINEAS) if linea.strip()]
+
+def _entrada_interrumpida(lineas, despues_de):
+    # Simula Ctrl+C mientras se lee la entrada
+    for i, linea in enumerate(lineas):
+        if i == despues_de:
+            raise KeyboardInterrupt
+        yield linea
+
+class SalidaInterrumpida(io.StringIO):
+    """Simula Ctrl+C al escribir el registro número `limite` (antes de escribirlo)"""
+
+    def __init__(self, limite):
+        super().__init__()
+        self.limite = limite
+        self.escritos = 0
+
+    def write(self, texto):
+        if self.escritos == self.limite:
+            raise KeyboardInterrupt
+        self.escritos += 1
+        return super().write(texto)
+
+def _reanudar(interrumpir, procesos):
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, 'estado.json')
+        primera = interrumpir(ruta, procesos)
+        completados = len(primera.getvalue().splitlines())
+        assert 0 < completados < len(INDICES)
+
+        segunda = io.StringIO()
+        resumen = procesar_lote(iter(LINEAS), segunda, checkpoint=ruta, procesos=procesos, en_vuelo=2)
+        registros = [json.loads(linea) for linea in (primera.getvalue() + segunda.getvalue()).splitlines()]
+
+        identificadores = [r['id'] for r in registros]
+        assert sorted(identificadores) == INDICES  # ninguno repetido ni perdido
+        assert all('error' not in r and r['resultado']['es_exacta'] for r in registros)
+        assert resumen['omitidos'] == completados
+        assert resumen['procesados'] == len(INDICES) - completados
+        assert Checkpoint(ruta).marca == len(LINEAS)
+
+def _interrumpir_entrada(ruta, procesos):
+    salida = io.StringIO()
+    try:
+        procesar_lote(_entrada_interrumpida(LINEAS, 12), salida, checkpoint=ruta, procesos=procesos, en_vuelo=2)
+    except KeyboardInterrupt:
+        return salida
+    raise AssertionError("la ejecución no se interrumpió")
+
+def _interrumpir_salida(ruta, procesos):
+    salida = SalidaInterrumpida(limite=7)
+    try:
+        procesar_lote(iter(LINEAS), salida, checkpoint=ruta, procesos=procesos, en_vuelo=2)
+    except KeyboardInterrupt:
+        return salida
+    raise AssertionError("la ejecución no se interrumpió")
+
+def test_reanudar_sin_pool():
+    _reanudar(_interrumpir_entrada, procesos=0)
+    _reanudar(_interrumpir_salida, procesos=0)
+
+def test_reanudar_con_pool():
+    _reanudar(_interrumpir_entrada, procesos=2)
+    _reanudar(_interrumpir_salida, procesos=2)
+
+if __name__ == "__main__":
+    for prueba in (test_reanudar_sin_pool, test_reanudar_con_pool):
+        prueba()
+        print(f"ok  {prueba.__name__}")
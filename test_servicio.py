@@ -0,0 +1,96 @@
+"""
+Prueba de humo del servicio local: levanta el servidor en un puerto libre (puerto 0)
+y lo consulta con servicio_analisis.consultar.
+
+Las ecuaciones "dormir:<segundos>" se despachan al pool como una espera de esa
+duración, para controlar cuánto dura cada cálculo.
+"""
+
+import asyncio
+import contextlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from servicio_analisis import ServicioAnalisis, iniciar_servidor, consultar, HOST_LOCAL
+
+def _dormir(segundos):
+    time.sleep(segundos)
+    return {'durmio': segundos}
+
+class ServicioDePrueba(ServicioAnalisis):
+    async def analizar(self, ecuacion, plazo=None):
+        if ecuacion.startswith('dormir:'):
+            return await self._resolver_clave(('dormir', ecuacion), plazo, _dormir, float(ecuacion[7:]))
+        return await super().analizar(ecuacion, plazo)
+
+@contextlib.contextmanager
+def servidor_local(**opciones):
+    """Servidor en un hilo con su propio loop; devuelve el puerto asignado"""
+    servicio = ServicioDePrueba(**opciones)
+    loop = asyncio.new_event_loop()
+    servidor = loop.run_until_complete(iniciar_servidor(servicio, HOST_LOCAL, 0))
+    hilo = threading.Thread(target=loop.run_forever, daemon=True)
+    hilo.start()
+    try:
+        yield servidor.sockets[0].getsockname()[1]
+    finally:
+        loop.call_soon_threadsafe(servidor.close)
+        asyncio.run_coroutine_threadsafe(servidor.wait_closed(), loop).result(10)
+        loop.call_soon_threadsafe(loop.stop)
+        hilo.join(10)
+        servicio.cerrar()
+        loop.close()
+
+def _salud(puerto):
+    estado, datos = consultar('/salud', puerto=puerto)
+    assert estado == 200
+    return datos
+
+def _esperar(condicion, plazo=10.0):
+    limite = time.monotonic() + plazo
+    while not condicion():
+        assert time.monotonic() < limite, "la condición no se cumplió a tiempo"
+        time.sleep(0.05)
+
+def test_analizar():
+    with servidor_local(procesos=1) as puerto:
+        estado, datos = consultar('/analizar', {'ecuacion': '(x-y+1)*dx-dy=0'}, puerto=puerto)
+        assert estado == 200
+        assert datos['es_exacta'] is False
+        assert datos['factor_integrante'] == 'exp(x)'
+
+def test_peticiones_identicas_comparten_calculo():
+    with servidor_local(procesos=2) as puerto, ThreadPoolExecutor(max_workers=4) as clientes:
+        respuestas = list(clientes.map(
+            lambda _: consultar('/analizar', {'ecuacion': 'dormir:1'}, puerto=puerto), range(4)))
+        assert respuestas == [(200, {'durmio': 1.0})] * 4
+        salud = _salud(puerto)
+        assert salud['calculos'] == 1
+        assert salud['combinadas'] == 3
+
+def test_saturado_responde_503():
+    with servidor_local(procesos=2, max_en_curso=2) as puerto, ThreadPoolExecutor(max_workers=2) as clientes:
+        ocupados = [clientes.submit(consultar, '/analizar', {'ecuacion': f'dormir:{s}'}, puerto=puerto)
+                    for s in (1.5, 1.6)]
+        _esperar(lambda: _salud(puerto)['en_curso'] == 2)
+        estado, datos = consultar('/analizar', {'ecuacion': 'dormir:0.1'}, puerto=puerto)
+        assert estado == 503
+        assert [f.result()[0] for f in ocupados] == [200, 200]
+        assert _salud(puerto)['rechazadas'] == 1
+
+def test_plazo_vencido_responde_504():
+    with servidor_local(procesos=1) as puerto:
+        estado, datos = consultar('/analizar', {'ecuacion': 'dormir:1.5', 'plazo': 0.2}, puerto=puerto)
+        assert estado == 504
+        salud = _salud(puerto)
+        assert salud['vencidas'] == 1
+        # El cálculo abandonado sigue ocupando su lugar hasta que termina en el pool
+        assert salud['en_curso'] == 1
+        _esperar(lambda: _salud(puerto)['en_curso'] == 0)
+
+if __name__ == "__main__":
+    for prueba in (test_analizar, test_peticiones_identicas_comparten_calculo,
+                   test_saturado_responde_503, test_plazo_vencido_responde_504):
+        prueba()
+        print(f"ok  {prueba.__name__}")